@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+# 저장소 루트의 공용 모듈 (shared/) / Repo-level shared/ package
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.bench_pages import main
+
+# [부하 테스트] 첫 화면과 JSON API 의 초당 요청 수 / p50 / p99 측정 (shared/bench_pages.py)
+# [Load Test] Requests/sec, p50 and p99 for the initial page and the JSON API (shared/bench_pages.py)
+#
+# Before:  COMMUTE_PAGE_CACHE=0 uvicorn main:app --port 8000
+# After:   COMMUTE_FAST_JSON=1 uvicorn main:app --port 8000
+# Run:     python bench_pages.py --url http://127.0.0.1:8000
+
+API = {
+    "GET /stations/suggest": {"method": "GET", "url": "/stations/suggest", "params": {"q": "zur"}},
+}
+
+if __name__ == "__main__":
+    main("Commute Score", API)
@@ -0,0 +1,86 @@
+import argparse
+import csv
+from pathlib import Path
+
+from stations import STATIONS_FILE, normalize
+
+# [역 목록 생성] opentransportdata.swiss 의 공식 service-point CSV 로 data/stations.txt 재생성
+# [Station List Builder] Regenerates data/stations.txt from the official service-point CSV
+# (https://opentransportdata.swiss, dataset "service-points"). Aliases already in the
+# current file are kept for stations that are still in the export.
+#
+# Run:  python build_stations.py actual_date-swiss-only-service_point-2026-10-18.csv
+
+HEADER = """\
+# Swiss railway stations used by the offline station resolver ({count} stations).
+# Format: Official name|alias|alias ...  (one station per line, UTF-8)
+# Case and accents are ignored when matching (Zurich == Zürich).
+# Names missing here are rejected with suggestions, so keep the list complete:
+# regenerate it from the official service-point export with build_stations.py
+# (or point COMMUTE_STATIONS_FILE at another list).
+"""
+
+
+def read_aliases(path: str) -> dict[str, list[str]]:
+    # 기존 파일의 별칭 유지 / normalized official name -> aliases from the current file
+    aliases = {}
+    if not Path(path).exists():
+        return aliases
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                names = [n.strip() for n in line.split("|") if n.strip()]
+                aliases[normalize(names[0])] = names[1:]
+    return aliases
+
+
+def read_official(path: str, name_column: str, all_points: bool) -> dict[str, str]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        dialect = csv.Sniffer().sniff(f.read(4096), delimiters=";,")
+        f.seek(0)
+        rows = csv.DictReader(f, dialect=dialect)
+
+        stations = {}
+        for row in rows:
+            # 스위스의 승하차 지점만 (열이 있을 때) / Swiss stop points only, when the columns exist
+            if not all_points:
+                if row.get("uicCountryCode", "85") != "85":
+                    continue
+                if row.get("stopPoint", "true").lower() not in ("true", "1"):
+                    continue
+            name = (row.get(name_column) or "").strip()
+            if name:
+                stations.setdefault(normalize(name), name)
+    return stations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build stations.txt from the official service-point CSV")
+    parser.add_argument("csv", help="Service-point CSV export")
+    parser.add_argument("--name-column", default="designationOfficial", help="Column with the official name")
+    parser.add_argument("--all-points", action="store_true", help="Keep non-stop and non-Swiss points")
+    parser.add_argument("-o", "--output", default=STATIONS_FILE, help="stations.txt to write")
+    args = parser.parse_args(argv)
+
+    aliases = read_aliases(args.output)
+    stations = read_official(args.csv, args.name_column, args.all_points)
+    if not stations:
+        raise SystemExit(f"No station names found in column '{args.name_column}'")
+
+    # 다른 역 이름과 겹치는 별칭은 버림 / Drop aliases that collide with another station
+    taken = set(stations)
+    lines = []
+    for key in sorted(stations):
+        kept = [a for a in aliases.get(key, []) if normalize(a) not in taken]
+        taken.update(normalize(a) for a in kept)
+        lines.append("|".join([stations[key], *kept]))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(HEADER.format(count=len(lines)))
+        f.write("\n".join(lines) + "\n")
+    print(f"✅ {len(lines)} stations -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+
+# [캐시] 자주 조회되는 (출발, 도착) 경로 결과를 메모리에 보관
+# [Cache] Keeps results of frequently requested (from, to) routes in memory
+
+
+def normalize_station(name: str) -> str:
+    # "  zurich   hb " -> "zurich hb"
+    return " ".join(name.split()).casefold()
+
+
+class RouteCache:
+    """TTL + LRU cache for commute lookups, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    @staticmethod
+    def make_key(home: str, work: str) -> tuple[str, str]:
+        return normalize_station(home), normalize_station(work)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            # 만료된 항목은 삭제 / Drop expired entries
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        # 최근 사용 항목을 맨 뒤로 이동 (LRU) / Mark as most recently used
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            # 가장 오래 사용되지 않은 항목 제거 / Evict the least recently used entry
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,9 +1,48 @@
-from fastapi import FastAPI, Request, Form
+import sys
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from pathlib import Path
+from fastapi import FastAPI, Request, Form, Query, HTTPException
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, ORJSONResponse
+
+# 저장소 루트의 공용 모듈 (shared/) / Repo-level shared/ package (metrics middleware)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.metrics import instrument
+from shared.page_cache import StaticPage
+
+from schema import CommuteMatrixRequest
 from services import CommuteService
+from stations import station_index
+import json
+import os
+
+# COMMUTE_PAGE_CACHE=0 이면 매 요청마다 첫 화면을 다시 렌더링 (부하 테스트 비교용)
+# COMMUTE_PAGE_CACHE=0 re-renders the initial page on every request (for before/after load tests)
+PAGE_CACHE = os.getenv("COMMUTE_PAGE_CACHE", "1") == "1"
+
+# 선택 사항: COMMUTE_FAST_JSON=1 이면 JSON API 응답을 orjson 으로 직렬화 (설치된 경우)
+# Opt-in: COMMUTE_FAST_JSON=1 serializes JSON API responses with orjson (if installed)
+FAST_JSON = os.getenv("COMMUTE_FAST_JSON", "0") == "1" and find_spec("orjson") is not None
+
+# 앱 수명 동안 HTTP 클라이언트 하나를 열어두고 종료 시 닫기
+# Open one HTTP client for the app lifetime and close it on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await CommuteService.startup()
+    app.state.initial_page = StaticPage(templates.get_template("commute.html").render(request=None, result=None))
+    yield
+    await CommuteService.shutdown()
 
-app = FastAPI(title="Swiss Commute Score Calculator 🚄")
+app = FastAPI(
+    title="Swiss Commute Score Calculator 🚄",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if FAST_JSON else JSONResponse,
+)
+
+# 경로별 지연 시간 + 업스트림 지연 시간 (services.py) -> GET /metrics
+# Per-route latency and upstream latency (services.py) at GET /metrics (Prometheus text format)
+instrument(app)
 
 # Specify the HTML templates directory
 templates = Jinja2Templates(directory="templates")
@@ -11,6 +50,9 @@ templates = Jinja2Templates(directory="templates")
 # 1. [GET] Display the initial form
 @app.get("/", response_class=HTMLResponse)
 async def read_form(request: Request):
+    # 미리 렌더링된 페이지 (gzip/brotli, ETag -> 304) / Pre-rendered page (gzip/brotli, ETag -> 304)
+    if PAGE_CACHE:
+        return request.app.state.initial_page.response(request)
     return templates.TemplateResponse("commute.html", {"request": request, "result": None})
 
 # 2. [POST] Process the calculation request
@@ -23,16 +65,26 @@ async def calculate_ui(
     
     print(f"📥 User Input Chec -> From: {home}, To: {work}")
 
-    data = await CommuteService.get_commute_data(home, work)
-    
     context = {
         "request": request,
         "home_input": home,  
         "work_input": work,  
     }
 
+    # 목록에 없는 역 이름은 네트워크 호출 없이 422 + 비슷한 역 제안
+    # Names missing from the station list: 422 with close matches, without any network call
+    unknown = CommuteService.unknown_stations([home, work])
+    if unknown:
+        context["error"] = "❌ " + " ".join(
+            f"Unknown station '{name}'." + (f" Did you mean: {', '.join(suggestions)}?" if suggestions else "")
+            for name, suggestions in unknown.items()
+        )
+        return templates.TemplateResponse("commute.html", context, status_code=422)
+
+    data = await CommuteService.get_commute_data(home, work)
+
     if not data:
-        context["error"] = f"❌ Cannot find a route from '{home}' to '{work}'. Please check the station names."
+        context["error"] = f"❌ Cannot find a route from '{home}' to '{work}'."
         return templates.TemplateResponse("commute.html", context)
 
     
@@ -75,3 +127,38 @@ async def calculate_ui(
         "request": request, 
         "result": result
     })
+
+# 3. [GET] Route cache statistics (hits / misses / size)
+@app.get("/cache/stats")
+async def cache_stats():
+    return CommuteService.cache.stats()
+
+# 4. [POST] Commute matrix: N homes × M workplaces (JSON)
+def check_stations(req: CommuteMatrixRequest):
+    # 알 수 없는 역이 있으면 조회 전에 422 / Unknown stations: 422 before any lookup
+    unknown = CommuteService.unknown_stations(req.homes + req.workplaces)
+    if unknown:
+        raise HTTPException(status_code=422, detail={"message": "Unknown stations", "suggestions": unknown})
+
+@app.post("/api/matrix")
+async def commute_matrix(req: CommuteMatrixRequest):
+    check_stations(req)
+    matrix = [[None] * len(req.workplaces) for _ in req.homes]
+    async for cell in CommuteService.iter_commute_matrix(req.homes, req.workplaces):
+        matrix[cell["home_index"]][cell["work_index"]] = cell
+    return {"homes": req.homes, "workplaces": req.workplaces, "matrix": matrix}
+
+# 5. [POST] Commute matrix streamed as NDJSON (one line per finished cell)
+@app.post("/api/matrix/stream")
+async def commute_matrix_stream(req: CommuteMatrixRequest):
+    check_stations(req)
+    async def ndjson():
+        async for cell in CommuteService.iter_commute_matrix(req.homes, req.workplaces):
+            yield json.dumps(cell, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+# 6. [GET] Station autocomplete (local index, no network call)
+@app.get("/stations/suggest")
+async def suggest_stations(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    return {"query": q, "stations": station_index.suggest(q, limit=limit)}
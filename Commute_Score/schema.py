@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # [요청 데이터] 사용자가 입력한 집과 회사 주소
 # [Request Data] Home and Work addresses input by the user
@@ -14,4 +14,10 @@ class CommuteResponse(BaseModel):
     duration_min: int       # 소요 시간 (분) / Duration in minutes
     transfers: int          # 환승 횟수 / Number of transfers
     score: str              # 등급 (A, B, C, D) / Grade score
-    message: str            # 결과 메시지 / Result message
\ No newline at end of file
+    message: str            # 결과 메시지 / Result message
+
+# [요청 데이터] 여러 후보 집 × 여러 직장 비교 (행렬)
+# [Request Data] Several candidate homes × several workplaces (matrix)
+class CommuteMatrixRequest(BaseModel):
+    homes: list[str] = Field(..., min_length=1, max_length=100)        # 후보 집 역 목록 / Candidate home stations
+    workplaces: list[str] = Field(..., min_length=1, max_length=20)    # 직장 역 목록 / Workplace stations
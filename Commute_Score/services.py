@@ -1,28 +1,105 @@
+import asyncio
 import httpx
 import os
+from importlib.util import find_spec
 from dotenv import load_dotenv
+from cache import RouteCache
+from stations import station_index
+from shared.metrics import timer
 
 load_dotenv()
 API_URL = os.getenv("SWISS_TRANSPORT_API_URL")
 
+# 경로 캐시 설정 / Route cache settings
+CACHE_TTL = float(os.getenv("COMMUTE_CACHE_TTL", "300"))
+CACHE_SIZE = int(os.getenv("COMMUTE_CACHE_SIZE", "1024"))
+
+# 동시에 보낼 수 있는 최대 업스트림 요청 수 / Max concurrent upstream lookups
+MAX_CONCURRENCY = int(os.getenv("COMMUTE_MAX_CONCURRENCY", "10"))
+
 class CommuteService:
+    # 앱 전체에서 공유하는 HTTP 클라이언트 (keep-alive 커넥션 재사용)
+    # One application-lifetime HTTP client (keep-alive connections are reused)
+    _client: httpx.AsyncClient | None = None
+    cache = RouteCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+    # 업스트림 동시 요청 제한 + 진행 중인 동일 조회 공유
+    # Bounded upstream fan-out + sharing of identical in-flight lookups
+    _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    _inflight: dict[tuple[str, str], asyncio.Future] = {}
+
+    @classmethod
+    async def startup(cls):
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(
+                # HTTP/2 is used when the 'h2' package is installed and the server supports it
+                http2=find_spec("h2") is not None,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=httpx.Timeout(10.0),
+            )
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
     @staticmethod
-    async def get_commute_data(home: str, work: str):
+    def resolve_station(name: str) -> str | None:
+        # 로컬 역 목록으로 검증 (오타는 네트워크 호출 전에 걸러짐)
+        # Validate against the bundled station list (typos never reach the network)
+        return station_index.resolve(name)
+
+    @staticmethod
+    def unknown_stations(names: list[str]) -> dict[str, list[str]]:
+        """Names missing from the station list, each with its closest matches (no network call)."""
+        return {
+            name: station_index.suggest(name, limit=3)
+            for name in dict.fromkeys(names)
+            if station_index.resolve(name) is None
+        }
+
+    @classmethod
+    async def get_commute_data(cls, home: str, work: str):
         
+        home, work = cls.resolve_station(home), cls.resolve_station(work)
+        if home is None or work is None:
+            return None
+
+        key = RouteCache.make_key(home, work)
+        cached = cls.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 같은 경로를 이미 조회 중이면 그 결과를 함께 기다림
+        # If the same route is already being fetched, wait for that result instead
+        task = cls._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(cls._fetch_commute_data(key, home, work))
+            cls._inflight[key] = task
+            task.add_done_callback(lambda _: cls._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def _fetch_commute_data(cls, key, home: str, work: str):
+
         params = {
             "from": home,
             "to": work,
             "limit": 1
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(API_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-            except httpx.HTTPError as e:
-                print(f"HTTP Error: {e}")
-                return None
+        await cls.startup()
+        try:
+            async with cls._semaphore:
+                # 세마포어 대기는 제외한 순수 업스트림 시간 / Upstream time only (semaphore wait excluded)
+                with timer("commute_upstream"):
+                    response = await cls._client.get(API_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            print(f"HTTP Error: {e}")
+            return None
 
         if not data.get("connections"):
             return None
@@ -44,12 +121,65 @@ class CommuteService:
         else:
             total_minutes = 0
 
-        return {
+        result = {
             "duration_min": total_minutes,
             "transfers": connection.get("transfers", 0),
             "from": connection["from"]["station"]["name"],
             "to": connection["to"]["station"]["name"]
         }
+        cls.cache.set(key, result)
+        return result
+
+    @classmethod
+    async def iter_commute_matrix(cls, homes: list[str], workplaces: list[str]):
+        """
+        Yields one matrix cell per (home, work) pair as soon as its lookup finishes.
+        Identical pairs (after normalization) are fetched only once.
+        """
+        home_stations = [cls.resolve_station(home) for home in homes]
+        work_stations = [cls.resolve_station(work) for work in workplaces]
+
+        cells: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        for i, home in enumerate(home_stations):
+            for j, work in enumerate(work_stations):
+                if home is None or work is None:
+                    # 알 수 없는 역은 바로 실패 처리 / Unknown stations fail without a lookup
+                    yield cls.build_cell(i, j, homes[i], workplaces[j], None)
+                    continue
+                cells.setdefault(RouteCache.make_key(home, work), []).append((i, j))
+
+        async def lookup(key, positions):
+            i, j = positions[0]
+            return positions, await cls.get_commute_data(homes[i], workplaces[j])
+
+        tasks = [asyncio.create_task(lookup(key, positions)) for key, positions in cells.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                positions, data = await next_done
+                for i, j in positions:
+                    yield cls.build_cell(i, j, homes[i], workplaces[j], data)
+        finally:
+            # 클라이언트가 연결을 끊으면 남은 조회 취소 / Cancel what is left if the client goes away
+            for task in tasks:
+                task.cancel()
+
+    @classmethod
+    def build_cell(cls, i: int, j: int, home: str, work: str, data) -> dict:
+        cell = {"home_index": i, "work_index": j, "home": home, "work": work}
+        if not data:
+            cell["error"] = f"Cannot find a route from '{home}' to '{work}'."
+            return cell
+
+        grade, msg = cls.calculate_score(data["duration_min"])
+        cell.update({
+            "from": data["from"],
+            "to": data["to"],
+            "duration_min": data["duration_min"],
+            "transfers": data["transfers"],
+            "score": grade,
+            "message": msg,
+        })
+        return cell
 
     @staticmethod
     def calculate_score(duration_min: int) -> tuple[str, str]:
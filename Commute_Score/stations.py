@@ -0,0 +1,122 @@
+import os
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+
+# [역 이름 인덱스] 네트워크 호출 없이 역 이름을 검증하고 자동완성
+# [Station Index] Validates and autocompletes station names without any network call
+
+STATIONS_FILE = os.getenv(
+    "COMMUTE_STATIONS_FILE",
+    str(Path(__file__).parent / "data" / "stations.txt"),
+)
+
+
+def normalize(name: str) -> str:
+    # "  Zürich   HB " -> "zurich hb" (case, accents and extra spaces are ignored)
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split()).casefold()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationIndex:
+    """
+    Sorted prefix array + trigram index over the bundled station list.
+    The file is read on first use, so app startup stays fast.
+    """
+
+    def __init__(self, path: str = STATIONS_FILE):
+        self.path = path
+        self._loaded = False
+        self._names: list[str] = []                 # official names
+        self._lookup: dict[str, int] = {}           # normalized name/alias -> station id
+        self._prefixes: list[tuple[str, int]] = []  # sorted (normalized word suffix, station id)
+        self._trigrams: dict[str, set[int]] = {}    # trigram -> station ids
+        self._gram_counts: list[int] = []           # trigram count of each official name
+
+    def _load(self):
+        if self._loaded:
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+
+                names = [n.strip() for n in line.split("|") if n.strip()]
+                station_id = len(self._names)
+                self._names.append(names[0])
+                self._gram_counts.append(len(trigrams(normalize(names[0]))))
+
+                for name in names:
+                    key = normalize(name)
+                    self._lookup.setdefault(key, station_id)
+
+                    # 단어 시작마다 접두사 검색 가능 ("oerl" -> "Zürich Oerlikon")
+                    # Every word start is searchable by prefix ("oerl" -> "Zürich Oerlikon")
+                    words = key.split(" ")
+                    for i in range(len(words)):
+                        self._prefixes.append((" ".join(words[i:]), station_id))
+
+                    for gram in trigrams(key):
+                        self._trigrams.setdefault(gram, set()).add(station_id)
+
+        self._prefixes.sort()
+        self._loaded = True
+
+    def __len__(self):
+        self._load()
+        return len(self._names)
+
+    def resolve(self, name: str) -> str | None:
+        """Returns the official station name, or None if the name is unknown."""
+        self._load()
+        station_id = self._lookup.get(normalize(name))
+        return None if station_id is None else self._names[station_id]
+
+    def suggest(self, query: str, limit: int = 10) -> list[str]:
+        """Prefix matches first, then fuzzy (trigram) matches for typos."""
+        self._load()
+        q = normalize(query)
+        if not q:
+            return []
+
+        found: list[int] = []
+
+        # 1. Prefix search (binary search in the sorted array)
+        i = bisect_left(self._prefixes, (q, -1))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(q) and len(found) < limit:
+            station_id = self._prefixes[i][1]
+            if station_id not in found:
+                found.append(station_id)
+            i += 1
+
+        # 2. Fuzzy search (shared trigrams) when prefixes are not enough
+        if len(found) < limit:
+            query_grams = trigrams(q)
+            shared: dict[int, int] = {}
+            for gram in query_grams:
+                for station_id in self._trigrams.get(gram, ()):
+                    shared[station_id] = shared.get(station_id, 0) + 1
+
+            # Jaccard similarity of the trigram sets
+            scores = {
+                station_id: count / (len(query_grams) + self._gram_counts[station_id] - count)
+                for station_id, count in shared.items()
+            }
+            for station_id in sorted(scores, key=scores.get, reverse=True):
+                if len(found) >= limit or scores[station_id] < 0.25:
+                    break
+                if station_id not in found:
+                    found.append(station_id)
+
+        return [self._names[station_id] for station_id in found]
+
+
+station_index = StationIndex()
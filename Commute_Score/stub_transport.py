@@ -0,0 +1,61 @@
+import asyncio
+import os
+import time
+from fastapi import FastAPI, Query
+
+# [로컬 스텁 서버] transport.opendata.ch 의 /v1/connections 응답 형식을 흉내냄
+# [Local Stub Server] Mimics the /v1/connections response of transport.opendata.ch
+#
+# Run:   uvicorn stub_transport:app --port 9000
+# Use:   SWISS_TRANSPORT_API_URL=http://127.0.0.1:9000/v1/connections uvicorn main:app
+
+app = FastAPI(title="Stub Swiss Transport API")
+
+# 인위적인 지연 (실제 API 왕복 시간 흉내) / Artificial upstream latency in seconds
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0.05"))
+
+# 역 이름 -> 가상의 위치 (분 단위) / Station name -> fake position (in minutes)
+STATIONS = {
+    "Zürich HB": 0,
+    "Bern": 56,
+    "Basel SBB": 53,
+    "Luzern": 41,
+    "Genève": 160,
+    "Lausanne": 130,
+    "Chur": 75,
+    "Cazis": 105,
+}
+
+calls = 0
+
+def find_station(name: str):
+    wanted = name.strip().casefold().replace("zurich", "zürich").replace("geneva", "genève")
+    for station in STATIONS:
+        if station.casefold() == wanted or station.casefold().split()[0] == wanted.split()[0]:
+            return station
+    return None
+
+@app.get("/v1/connections")
+async def connections(from_: str = Query(..., alias="from"), to: str = Query(...), limit: int = 1):
+    global calls
+    calls += 1
+    await asyncio.sleep(STUB_LATENCY)
+
+    origin, destination = find_station(from_), find_station(to)
+    if origin is None or destination is None:
+        return {"connections": []}
+
+    departure = int(time.time())
+    minutes = abs(STATIONS[origin] - STATIONS[destination]) or 5
+    return {
+        "connections": [{
+            "from": {"station": {"name": origin}, "departureTimestamp": departure},
+            "to": {"station": {"name": destination}, "arrivalTimestamp": departure + minutes * 60},
+            "transfers": minutes // 60,
+        }][:limit]
+    }
+
+@app.get("/stats")
+async def stats():
+    # 업스트림 호출 횟수 (캐시 효과 확인용) / Upstream call count (to verify caching)
+    return {"calls": calls}
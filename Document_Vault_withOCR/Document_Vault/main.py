@@ -1,55 +1,115 @@
-import shutil   
 import os        
-import pytesseract  
-from PIL import Image   
 
 
 from fastapi import ( 
     FastAPI, UploadFile, File, Depends, 
-    BackgroundTasks, Request, Form
+    Request, Form, Query
 )
 
-from fastapi.responses import HTMLResponse, RedirectResponse 
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, Response
 from fastapi import HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import get_db, engine, Base
 import models
+from ocr_worker import enqueue
+from storage import UPLOAD_DIR, store_stream
+from search import MAX_PAGE_SIZE as MAX_SEARCH_PAGE_SIZE, ensure_search_index, search_documents
+from thumbnails import CACHE_CONTROL, FORMATS, SIZES, derived_cache, etag_for
+from shared.metrics import instrument
 
 
 models.Base.metadata.create_all(bind=engine)
+models.upgrade_schema(engine)
+ensure_search_index(engine)
 
 
 app = FastAPI(title="Swiss Document Vault 🏦")
 
+# 요청 지연/처리 중 요청 수 + 커넥션 풀 메트릭 -> GET /metrics (Prometheus)
+# Request latency / in-flight + connection pool metrics at GET /metrics (Prometheus text format)
+instrument(app)
+
 
 templates = Jinja2Templates(directory="templates")
-os.makedirs("uploads", exist_ok=True) 
 
-app.mount("/static", StaticFiles(directory="uploads"), name="static")
+# 목록 한 페이지의 문서 수 / Documents per listing page
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+os.makedirs(UPLOAD_DIR, exist_ok=True) 
+derived_cache.load()
 
 
-def process_ocr_task(doc_id: int, file_path: str, db: Session):
-    try:
-        print(f"🔄 OCR Start: {file_path}")
-        image = Image.open(file_path) # 이미지 열기
-        text = pytesseract.image_to_string(image) # 글자 읽기
-        
-        # DB 업데이트
-        doc = db.query(models.UserDocument).filter(models.UserDocument.id == doc_id).first()
-        if doc:
-            doc.extracted_text = text
-            db.commit()
-            print(f"✅ OCR Finish: Document {doc_id} updated.")
-    except Exception as e:
-        print(f"❌ OCR Error: {e}")
+class ContentAddressedFiles(StaticFiles):
+    # 원본 경로는 SHA-256 이므로 내용이 바뀌지 않음 -> 오래 캐시
+    # Originals live under their SHA-256, so a URL's content never changes
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+
+app.mount("/static", ContentAddressedFiles(directory=UPLOAD_DIR), name="static")
 
 
+# OCR 은 별도의 워커 프로세스에서 실행 (ocr_worker.py)
+# OCR runs in separate worker processes (ocr_worker.py), fed by the ocr_jobs table
+
+
+# 동기 Session 쿼리이므로 일반 def (스레드풀에서 실행) / Plain def: the sync query runs in the threadpool
 @app.get("/", response_class=HTMLResponse)
-async def read_documents(request: Request, db: Session = Depends(get_db)):
-    docs = db.query(models.UserDocument).order_by(models.UserDocument.id.desc()).all()
-    return templates.TemplateResponse("vault.html", {"request": request, "docs": docs})
+def read_documents(
+    request: Request,
+    before: int | None = Query(None, description="Show documents with an id below this one (keyset cursor)"),
+    size: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    # 화면에 보이는 컬럼만 + id 커서 (OFFSET 없음): 문서 수와 무관하게 일정한 비용
+    # Only the displayed columns + an id cursor (no OFFSET): constant cost however big the vault is
+    query = db.query(
+        models.UserDocument.id,
+        models.UserDocument.filename,
+        models.UserDocument.upload_date,
+        models.UserDocument.ocr_status,
+        models.UserDocument.sha256,
+    )
+    if before is not None:
+        query = query.filter(models.UserDocument.id < before)
+    rows = query.order_by(models.UserDocument.id.desc()).limit(size + 1).all()
+
+    docs = rows[:size]
+    next_before = docs[-1].id if len(rows) > size else None
+    return templates.TemplateResponse("vault.html", {
+        "request": request,
+        "docs": docs,
+        "size": size,
+        "is_first_page": before is None,
+        "next_before": next_before,
+    })
+
+# 동기 Session 쿼리이므로 일반 def -> FastAPI 가 스레드풀에서 실행 (이벤트 루프를 막지 않음)
+# Plain def: the Session queries are synchronous, so FastAPI runs these in its threadpool
+@app.get("/search", response_class=HTMLResponse)
+def search_page(
+    request: Request,
+    q: str = Query("", max_length=200),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    results = search_documents(db, q, page, size)
+    return templates.TemplateResponse("search.html", {"request": request, **results})
+
+@app.get("/api/search")
+def search_api(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    return search_documents(db, q, page, size)
 
 @app.get("/documents/{doc_id}", response_class=HTMLResponse)
 async def read_document_detail(request: Request, doc_id: int, db: Session = Depends(get_db)):
@@ -63,48 +123,168 @@ async def read_document_detail(request: Request, doc_id: int, db: Session = Depe
 
     return templates.TemplateResponse("detail.html", {"request": request, "doc": doc})
 
+@app.get("/thumbs/{sha256}/{size}.{fmt}")
+async def read_thumbnail(request: Request, sha256: str, size: str, fmt: str, db: Session = Depends(get_db)):
+    if size not in SIZES or fmt not in FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown preview size or format")
+
+    etag = etag_for(sha256, size, fmt)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    # 해시가 같으면 내용도 같음 -> DB 조회 없이 304 / Same hash, same bytes: 304 without touching the DB
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    def find_source():
+        try:
+            return db.query(models.UserDocument.filepath).filter(models.UserDocument.sha256 == sha256).first()
+        finally:
+            # 리사이즈를 기다리는 동안 DB 연결을 붙잡지 않음 / Don't hold a pooled connection while waiting for the resize
+            db.close()
+
+    # 동기 쿼리는 스레드풀에서 (이벤트 루프를 막지 않음) / The sync lookup runs in the threadpool, off the event loop
+    source = await run_in_threadpool(find_source)
+    if not source:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    try:
+        path = await derived_cache.get(sha256, source.filepath, size, fmt)
+    except (OSError, RuntimeError):
+        # 이미지가 아니거나 PDF 렌더러가 없음 / Not an image, or no PDF renderer installed
+        raise HTTPException(status_code=404, detail="No preview available for this document")
+
+    return FileResponse(path, media_type=FORMATS[fmt][1], headers=headers)
+
+@app.get("/documents/{doc_id}/status")
+def read_document_status(doc_id: int, db: Session = Depends(get_db)):
+    # 폴링이 잦으므로 동기 쿼리는 스레드풀에서 / Polled often: plain def keeps the sync queries off the event loop
+    doc = db.query(models.UserDocument.ocr_status).filter(models.UserDocument.id == doc_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    job = (
+        db.query(models.OcrJob)
+        .filter(models.OcrJob.document_id == doc_id)
+        .order_by(models.OcrJob.id.desc())
+        .first()
+    )
+    if not job:
+        # 중복 업로드는 작업 없이 원본의 결과를 받음 / Duplicate uploads have no job of their own
+        return {
+            "document_id": doc_id,
+            "status": doc.ocr_status,
+            "attempts": 0,
+            "error": None,
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    return {
+        "document_id": doc_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
 @app.post("/upload")
-async def upload_document(
+def upload_document(
     request: Request,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    file_location = f"uploads/{file.filename}"
-    
-
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
+    # 동기 핸들러 -> 저장, 해시, 중복 조회, 커밋 모두 스레드풀에서 (이벤트 루프를 막지 않음)
+    # Plain def: storing, hashing, the dedup query and the commit all run in the threadpool, off the event loop
+    # 청크 단위로 저장하면서 SHA-256 계산 / Stream to disk in chunks while hashing
+    stored = store_stream(file.file, file.filename)
 
     new_doc = models.UserDocument(
         filename=file.filename,
-        filepath=file_location,
+        filepath=stored.path,
         content_type=file.content_type,
-        extracted_text="Processing..." 
+        sha256=stored.sha256,
+        file_size=stored.size,
+        extracted_text=None
     )
     db.add(new_doc)
-    db.commit()
-    db.refresh(new_doc)
-
-
-    background_tasks.add_task(process_ocr_task, new_doc.id, file_location, db)
+    db.flush()
 
+    # 같은 내용의 문서가 이미 있으면 OCR 을 다시 하지 않음
+    # Identical content was uploaded before: reuse its text instead of running OCR again
+    previous = (
+        db.query(models.UserDocument.extracted_text, models.UserDocument.ocr_status)
+        .filter(
+            models.UserDocument.sha256 == stored.sha256,
+            models.UserDocument.id != new_doc.id,
+            models.UserDocument.ocr_status != models.OCR_FAILED,
+        )
+        .order_by(models.UserDocument.id)
+        .first()
+    )
+    if previous is None:
+        # 문서와 OCR 작업을 한 트랜잭션으로 저장 / Document and its OCR job are saved together
+        enqueue(db, new_doc)
+    elif previous.ocr_status == models.OCR_DONE:
+        new_doc.extracted_text = previous.extracted_text
+        new_doc.ocr_status = models.OCR_DONE
+    else:
+        # 아직 처리 중 -> 워커가 끝나면 결과를 복사해 줌 / Still in progress: the worker copies the result over
+        new_doc.ocr_status = models.OCR_QUEUED
+    db.commit()
 
-    docs = db.query(models.UserDocument).order_by(models.UserDocument.id.desc()).all()
-    
     return RedirectResponse(url="/", status_code=303)
 
 
 @app.post("/delete/{doc_id}")
-async def delete_document(doc_id: int, db: Session = Depends(get_db)):
+def delete_document(doc_id: int, db: Session = Depends(get_db)):
+    # 동기 핸들러 -> 쿼리, 파일 삭제, 커밋은 스레드풀에서 / Plain def: queries, file removal and commit run in the threadpool
     doc = db.query(models.UserDocument).filter(models.UserDocument.id == doc_id).first()
     
     if doc:
 
-        if os.path.exists(doc.filepath):
+        # 같은 파일을 쓰는 다른 문서가 없을 때만 파일 삭제 / Only delete the file if no other document shares it
+        shared = (
+            db.query(models.UserDocument.id)
+            .filter(models.UserDocument.filepath == doc.filepath, models.UserDocument.id != doc.id)
+            .first()
+        )
+        if not shared and os.path.exists(doc.filepath):
             os.remove(doc.filepath)
             
+        # 대기/처리 중인 작업은 그 결과를 기다리는 중복 문서에게 넘김 (없으면 삭제)
+        # A pending or running job is handed to a duplicate still waiting for its result (else deleted)
+        waiting = doc.sha256 and (  # 예전 문서는 해시가 없음 / Documents from older versions have no hash
+            db.query(models.UserDocument)
+            .filter(
+                models.UserDocument.sha256 == doc.sha256,
+                models.UserDocument.id != doc.id,
+                models.UserDocument.ocr_status.in_([models.OCR_QUEUED, models.OCR_RUNNING]),
+            )
+            .order_by(models.UserDocument.id)
+            .first()
+        )
+        pending = (
+            db.query(models.OcrJob)
+            .filter(
+                models.OcrJob.document_id == doc_id,
+                models.OcrJob.status.in_([models.OCR_QUEUED, models.OCR_RUNNING]),
+            )
+            .first()
+        )
+        if waiting and pending is not None:
+            # 처리 중이던 작업은 다시 대기열로 (이미 인식한 페이지는 캐시에서 재사용)
+            # A running job goes back in the queue (pages already recognized come from the page cache)
+            db.query(models.OcrJob).filter(models.OcrJob.id == pending.id).update(
+                {"document_id": waiting.id, "status": models.OCR_QUEUED, "worker": None},
+                synchronize_session=False,
+            )
+            waiting.ocr_status = models.OCR_QUEUED
+        elif waiting and waiting.ocr_status == models.OCR_QUEUED and not (
+            db.query(models.OcrJob.id).filter(models.OcrJob.document_id == waiting.id).first()
+        ):
+            enqueue(db, waiting)
+
+        db.query(models.OcrJob).filter(models.OcrJob.document_id == doc_id).delete()
         db.delete(doc)
         db.commit()
         
@@ -1,6 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+import os
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, inspect, text
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from database import Base
+from storage import UPLOAD_DIR
+
+# OCR 상태 / OCR status of a document (and of its job)
+OCR_QUEUED = "queued"
+OCR_RUNNING = "running"
+OCR_DONE = "done"
+OCR_FAILED = "failed"
 
 class UserDocument(Base):
     __tablename__ = "documents"
@@ -9,6 +18,81 @@ class UserDocument(Base):
     filename = Column(String, index=True)
     filepath = Column(String)
     content_type = Column(String)
+    sha256 = Column(String(64), index=True)  # content hash (same file -> same hash)
+    file_size = Column(BigInteger)
   
-    extracted_text = Column(Text, nullable=True)
+    # OCR 텍스트는 클 수 있으므로 실제로 읽을 때만 로드 (상세 화면)
+    # OCR text can be huge: only loaded when accessed (detail view), never by default
+    extracted_text = deferred(Column(Text, nullable=True))
+    ocr_status = Column(String, default=OCR_QUEUED, server_default=OCR_QUEUED)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def static_url(self) -> str:
+        # uploads/ab/cd/<hash>.png -> /static/ab/cd/<hash>.png
+        return "/static/" + os.path.relpath(self.filepath, UPLOAD_DIR).replace(os.sep, "/")
+
+class OcrJob(Base):
+    """
+    Persistent OCR queue: one row per document, claimed by the worker processes
+    (ocr_worker.py) and moved through queued -> running -> done / failed.
+    """
+    __tablename__ = "ocr_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True)
+    status = Column(String, default=OCR_QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    worker = Column(String, nullable=True)  # "host:pid" of the worker that claimed the job
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class OcrPageCache(Base):
+    """
+    Recognized text of one preprocessed page, keyed by the page's image hash
+    (ocr_pipeline.py). Written as soon as a page is done, so a retried job only
+    recognizes the pages it had not finished yet.
+    """
+    __tablename__ = "ocr_page_cache"
+
+    image_hash = Column(String(64), primary_key=True)
+    text = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# 예전 버전이 만든 documents 테이블에 없는 컬럼 (create_all 은 기존 테이블을 바꾸지 않음)
+# Columns an older documents table lacks (create_all never alters an existing table)
+UPGRADE_COLUMNS = {
+    "ocr_status": f"VARCHAR DEFAULT '{OCR_QUEUED}'",
+    "sha256": "VARCHAR(64)",
+    "file_size": "BIGINT",
+}
+
+
+def upgrade_schema(engine):
+    """
+    Adds the new documents columns to a table created by an older version (idempotent).
+    Old documents with text are marked done; the ones without get an OCR job.
+    Run it after create_all, so the ocr_jobs table exists.
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns("documents")}
+    # Postgres 는 IF NOT EXISTS 로 웹과 워커가 동시에 시작해도 안전 / Safe when web and workers start together
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    with engine.begin() as conn:
+        for name, ddl in UPGRADE_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE documents ADD COLUMN {if_not_exists}{name} {ddl}"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_documents_sha256 ON documents (sha256)"))
+
+        if "ocr_status" not in existing:
+            params = {"queued": OCR_QUEUED, "done": OCR_DONE}
+            conn.execute(text(
+                "UPDATE documents SET ocr_status = CASE WHEN extracted_text IS NULL THEN :queued ELSE :done END"
+            ), params)
+            conn.execute(text(
+                "INSERT INTO ocr_jobs (document_id, status, attempts) "
+                "SELECT d.id, :queued, 0 FROM documents d WHERE d.extracted_text IS NULL "
+                "AND NOT EXISTS (SELECT 1 FROM ocr_jobs j WHERE j.document_id = d.id)"
+            ), {"queued": OCR_QUEUED})
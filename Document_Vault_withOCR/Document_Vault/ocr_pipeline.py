@@ -0,0 +1,148 @@
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pytesseract
+from PIL import Image, ImageOps, ImageSequence
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+import models
+from shared.metrics import timer
+
+# [OCR 파이프라인] 전처리 -> 페이지 분할 -> 페이지 병렬 인식 -> 순서대로 이어 붙이기
+# [OCR Pipeline] Preprocess -> split into pages -> recognize pages in parallel -> stitch in order
+# Every page result is cached by image hash, so a retry after a crash resumes where it stopped.
+
+# 긴 변 최대 픽셀 (A4 @ 300 DPI = 3508) / Longest side in pixels (A4 at 300 DPI = 3508)
+MAX_SIDE = int(os.getenv("VAULT_OCR_MAX_SIDE", "3508"))
+# PDF 를 이미지로 바꿀 때의 해상도 / Resolution used to render PDF pages
+PDF_DPI = int(os.getenv("VAULT_OCR_PDF_DPI", "300"))
+# 한 문서 안에서 동시에 인식할 페이지 수 / Pages recognized at the same time within one document
+PAGE_THREADS = int(os.getenv("VAULT_OCR_PAGE_THREADS", "2"))
+# Tesseract 언어 (예: "deu+fra+eng") / Tesseract languages (e.g. "deu+fra+eng")
+OCR_LANG = os.getenv("VAULT_OCR_LANG", "eng")
+
+# 페이지를 병렬로 돌리므로 Tesseract 자체의 멀티스레딩은 끔 (과도한 스레드 방지)
+# Pages already run in parallel, so keep each Tesseract process single-threaded
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def preprocess(page: Image.Image) -> Image.Image:
+    """Grayscale, downscale to ~300 DPI and binarize (Otsu threshold)."""
+    page = ImageOps.exif_transpose(page)  # 휴대폰 사진 회전 보정 / Fix phone photo rotation
+    gray = ImageOps.grayscale(page)
+
+    longest = max(gray.size)
+    if longest > MAX_SIDE:
+        scale = MAX_SIDE / longest
+        gray = gray.resize((round(gray.width * scale), round(gray.height * scale)), Image.Resampling.LANCZOS)
+
+    gray = ImageOps.autocontrast(gray, cutoff=1)
+    threshold = otsu_threshold(gray.histogram())
+    return gray.point(lambda value: 255 if value > threshold else 0, mode="1")
+
+
+def otsu_threshold(histogram: list[int]) -> int:
+    """Gray level that best separates ink from paper (maximizes between-class variance)."""
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_background, weight_background = 0.0, 0
+    best_level, best_variance = 127, 0.0
+
+    for level, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += level * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def iter_pages(file_path: str):
+    """Yields one image per page: PDF pages (needs pdf2image + poppler) or image frames."""
+    if file_path.lower().endswith(".pdf"):
+        try:
+            from pdf2image import convert_from_path, pdfinfo_from_path
+        except ImportError:
+            raise RuntimeError("PDF documents require the optional 'pdf2image' package (and poppler)")
+
+        # 한 페이지씩 렌더링 -> 메모리 사용량 일정 / One page at a time keeps memory bounded
+        for number in range(1, pdfinfo_from_path(file_path)["Pages"] + 1):
+            yield convert_from_path(file_path, dpi=PDF_DPI, first_page=number, last_page=number)[0]
+        return
+
+    with Image.open(file_path) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield frame.copy()
+
+
+def page_hash(page: Image.Image) -> str:
+    # 전처리된 이미지 + 언어 설정 -> 설정이 바뀌면 캐시도 자동으로 무효
+    # Preprocessed pixels + OCR language: changing either misses the cache
+    digest = hashlib.sha256(f"{OCR_LANG}:{page.mode}:{page.size}".encode())
+    digest.update(page.tobytes())
+    return digest.hexdigest()
+
+
+def recognize(page: Image.Image) -> str:
+    with timer("ocr_page"):
+        return pytesseract.image_to_string(page, lang=OCR_LANG)
+
+
+def _cached_text(db, image_hash: str) -> str | None:
+    entry = db.get(models.OcrPageCache, image_hash)
+    return None if entry is None else entry.text
+
+
+def _store_text(db, image_hash: str, text: str):
+    # 페이지마다 바로 커밋 -> 중간에 죽어도 끝난 페이지는 남음
+    # Committed per page, so finished pages survive a crash
+    db.add(models.OcrPageCache(image_hash=image_hash, text=text))
+    try:
+        db.commit()
+    except IntegrityError:  # 다른 워커가 같은 페이지를 먼저 저장 / Another worker stored it first
+        db.rollback()
+
+
+def ocr_document(file_path: str, threads: int = PAGE_THREADS) -> str:
+    """
+    Recognizes every page of the document and returns the texts in page order
+    (separated by form feeds). Cached pages are not recognized again; at most
+    `threads` pages are waiting or running at any time (bounded memory).
+    """
+    texts: dict[int, str] = {}
+    running = {}  # future -> (page number, image hash)
+
+    with SessionLocal() as db, ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+
+        def collect(done):
+            for future in done:
+                number, image_hash = running.pop(future)
+                texts[number] = future.result()
+                _store_text(db, image_hash, texts[number])
+
+        for number, page in enumerate(iter_pages(file_path)):
+            page = preprocess(page)
+            image_hash = page_hash(page)
+
+            cached = _cached_text(db, image_hash)
+            if cached is not None:
+                texts[number] = cached
+                continue
+
+            if len(running) >= max(1, threads):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+            running[pool.submit(recognize, page)] = (number, image_hash)
+
+        collect(wait(running).done)
+
+    return "\f".join(texts[number] for number in sorted(texts))
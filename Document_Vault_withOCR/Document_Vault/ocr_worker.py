@@ -0,0 +1,213 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from database import SessionLocal, engine, Base
+import models
+from ocr_pipeline import ocr_document
+from search import ensure_search_index
+from shared.metrics import Counter, serve_metrics, timer
+
+# 워커 프로세스는 웹 앱이 없으므로 각자 --metrics-port 로 /metrics 를 노출
+# Worker processes have no web app: each serves its own /metrics (--metrics-port + worker index)
+JOBS = Counter("ocr_jobs_total", "OCR jobs finished by this worker", ["status"])
+
+# [OCR 워커] 웹 서버와 분리된 프로세스들이 DB 의 ocr_jobs 테이블에서 작업을 가져와 처리
+# [OCR Worker] Separate processes claim jobs from the ocr_jobs table, so OCR never
+# competes with request handling in the web process.
+#
+# Run:   python ocr_worker.py                 # one worker per CPU core
+#        python ocr_worker.py --workers 4 --drain
+
+
+def ocr_file(file_path: str) -> str:
+    """
+    Preprocesses and recognizes every page (multi-page TIFFs and PDFs included),
+    pages in parallel, with finished pages cached -> see ocr_pipeline.py.
+    """
+    # 페이지 사이는 form feed (Tesseract 와 같은 구분자) / Pages separated by form feed, like Tesseract
+    return ocr_document(file_path)
+
+
+def enqueue(db, doc: models.UserDocument) -> models.OcrJob:
+    """Adds a queued job for the document (the caller commits, in the same transaction)."""
+    doc.ocr_status = models.OCR_QUEUED
+    job = models.OcrJob(document_id=doc.id, status=models.OCR_QUEUED)
+    db.add(job)
+    return job
+
+
+def claim_next_job(db, worker: str) -> int | None:
+    """
+    Moves the oldest queued job to 'running' and returns its id.
+    FOR UPDATE SKIP LOCKED lets workers claim jobs without waiting on each other (Postgres);
+    the conditional UPDATE keeps it safe on SQLite, where the clause is ignored.
+    """
+    while True:
+        row = db.execute(
+            select(models.OcrJob.id, models.OcrJob.document_id)
+            .where(models.OcrJob.status == models.OCR_QUEUED)
+            .order_by(models.OcrJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if row is None:
+            db.rollback()
+            return None
+
+        claimed = db.execute(
+            update(models.OcrJob)
+            .where(models.OcrJob.id == row.id, models.OcrJob.status == models.OCR_QUEUED)
+            .values(
+                status=models.OCR_RUNNING,
+                worker=worker,
+                attempts=models.OcrJob.attempts + 1,
+                started_at=datetime.now(timezone.utc),
+            )
+        )
+        if claimed.rowcount == 1:
+            db.execute(
+                update(models.UserDocument)
+                .where(models.UserDocument.id == row.document_id)
+                .values(ocr_status=models.OCR_RUNNING)
+            )
+            db.commit()
+            return row.id
+
+        # 다른 워커가 먼저 가져감 -> 다음 작업 시도 / Another worker won the race, try the next job
+        db.rollback()
+
+
+def run_job(job_id: int, ocr=ocr_file):
+    """Processes one claimed job with its own session and records done/failed."""
+    with SessionLocal() as db:
+        job = db.get(models.OcrJob, job_id)
+        if job is None:  # 문서와 함께 삭제됨 / Deleted together with its document
+            return
+        doc = db.get(models.UserDocument, job.document_id)
+
+        if doc is not None and doc.ocr_status == models.OCR_DONE:
+            # 같은 내용의 다른 문서 덕분에 이미 완료됨 / Already filled in from a duplicate upload
+            job.status = models.OCR_DONE
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            return
+
+        try:
+            if doc is None:
+                raise FileNotFoundError(f"Document {job.document_id} no longer exists")
+            print(f"🔄 OCR Start: {doc.filepath}")
+            with timer("ocr_document"):
+                text = ocr(doc.filepath)
+        except Exception as e:
+            print(f"❌ OCR Error (job {job_id}): {e}")
+            job.status = models.OCR_FAILED
+            job.error = str(e)
+            if doc is not None:
+                doc.ocr_status = models.OCR_FAILED
+        else:
+            doc.extracted_text = text
+            doc.ocr_status = models.OCR_DONE
+            job.status = models.OCR_DONE
+            job.error = None
+            print(f"✅ OCR Finish: Document {doc.id} updated.")
+
+        if doc is not None and doc.sha256:
+            # 처리 중에 올라온 같은 파일의 문서들도 같은 결과로 갱신
+            # Duplicates uploaded while this job was pending get the same result
+            db.execute(
+                update(models.UserDocument)
+                .where(
+                    models.UserDocument.sha256 == doc.sha256,
+                    models.UserDocument.id != doc.id,
+                    models.UserDocument.ocr_status == models.OCR_QUEUED,
+                )
+                .values(extracted_text=doc.extracted_text, ocr_status=doc.ocr_status)
+            )
+
+        job.finished_at = datetime.now(timezone.utc)
+        try:
+            db.commit()
+        except StaleDataError:
+            # 처리 중에 문서가 삭제됨 -> 작업은 대기 중인 중복 문서로 넘어갔거나 함께 삭제됨
+            # The document was deleted mid-job: its job was handed to a waiting duplicate or deleted too
+            db.rollback()
+            print(f"⚠️ OCR Skipped: the document of job {job_id} was deleted during OCR")
+            return
+        JOBS.labels(job.status).inc()
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    """Puts 'running' jobs of crashed workers back in the queue."""
+    cutoff = datetime.now(timezone.utc) - older_than
+    with SessionLocal() as db:
+        result = db.execute(
+            update(models.OcrJob)
+            .where(models.OcrJob.status == models.OCR_RUNNING, models.OcrJob.started_at < cutoff)
+            .values(status=models.OCR_QUEUED, worker=None)
+        )
+        db.commit()
+        return result.rowcount
+
+
+def worker_loop(poll_interval: float = 1.0, drain: bool = False, ocr=ocr_file, metrics_port: int | None = None):
+    """Claims and runs jobs until stopped (or until the queue is empty with drain=True)."""
+    # 부모 프로세스의 연결을 재사용하지 않음 / Never reuse connections inherited from the parent
+    engine.dispose(close=False)
+    if metrics_port is not None:
+        serve_metrics(metrics_port)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    while True:
+        with SessionLocal() as db:
+            job_id = claim_next_job(db, worker)
+        if job_id is not None:
+            run_job(job_id, ocr)
+        elif drain:
+            return
+        else:
+            time.sleep(poll_interval)
+
+
+def run_pool(workers: int, poll_interval: float = 1.0, drain: bool = False, ocr=ocr_file, metrics_port: int | None = None):
+    """Starts `workers` processes and waits for them (worker i serves metrics on metrics_port + i)."""
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=worker_loop,
+            args=(poll_interval, drain, ocr, None if metrics_port is None else metrics_port + i),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Document Vault OCR workers")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU cores)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls when the queue is empty")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    parser.add_argument("--stale-after", type=float, default=600, help="Requeue 'running' jobs older than this (seconds)")
+    parser.add_argument("--metrics-port", type=int, help="Serve /metrics on this port (+1 per additional worker)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    models.upgrade_schema(engine)
+    ensure_search_index(engine)
+    requeued = requeue_stale_jobs(timedelta(seconds=args.stale_after))
+    print(f"👷 Starting {args.workers} OCR worker(s) ({requeued} stale job(s) requeued)")
+    run_pool(args.workers, args.poll, args.drain, metrics_port=args.metrics_port)
@@ -0,0 +1,182 @@
+import html
+import os
+from types import SimpleNamespace
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, text
+
+# [전문 검색] OCR 로 추출한 텍스트를 전문 검색 인덱스로 검색
+# [Full-Text Search] Searches the OCR'd text through a real full-text index:
+#   - PostgreSQL: generated tsvector column + GIN index
+#   - SQLite (local runs): FTS5 external-content table kept in sync by triggers
+# Both are updated in the same transaction that stores the OCR result, so every
+# finished document is searchable right away (no batch reindexing).
+
+# Postgres 텍스트 검색 설정 ('simple' = 언어 무관) / Text search config ('simple' is language-neutral)
+SEARCH_CONFIG = os.getenv("VAULT_SEARCH_CONFIG", "simple")
+
+MAX_PAGE_SIZE = 50
+
+# 하이라이트 표시용 (HTML 이스케이프 후 <mark> 로 바꿈)
+# Highlight markers (private-use characters), turned into <mark> after HTML escaping
+MARK_START, MARK_END = "\ue000", "\ue001"
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(filename, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(extracted_text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_documents_search_vector ON documents USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        filename, extracted_text,
+        content='documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts(rowid, filename, extracted_text)
+        VALUES (new.id, new.filename, new.extracted_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, filename, extracted_text)
+        VALUES ('delete', old.id, old.filename, old.extracted_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE OF filename, extracted_text ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, filename, extracted_text)
+        VALUES ('delete', old.id, old.filename, old.extracted_text);
+        INSERT INTO documents_fts(rowid, filename, extracted_text)
+        VALUES (new.id, new.filename, new.extracted_text);
+    END
+    """,
+]
+
+POSTGRES_QUERY = f"""
+    WITH hits AS (
+        SELECT id, ts_rank_cd(search_vector, query) AS rank
+        FROM documents, websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query
+        WHERE search_vector @@ query
+        ORDER BY rank DESC, id DESC
+        LIMIT :limit OFFSET :offset
+    )
+    -- 스니펫은 현재 페이지의 문서에만 생성 / Snippets are only built for the current page
+    SELECT d.id, d.filename, d.upload_date, hits.rank,
+           ts_headline('{SEARCH_CONFIG}', coalesce(d.extracted_text, ''),
+                       websearch_to_tsquery('{SEARCH_CONFIG}', :q),
+                       'StartSel={MARK_START}, StopSel={MARK_END}, MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+    FROM hits JOIN documents d ON d.id = hits.id
+    ORDER BY hits.rank DESC, d.id DESC
+"""
+
+# SQLite: 1) 순위만 계산 (현재 페이지의 id) 2) 그 문서들만 스니펫 생성
+# SQLite: 1) rank matches and keep the page's ids, 2) build snippets for those rows only
+SQLITE_RANK_QUERY = """
+    SELECT rowid AS id, bm25(documents_fts, 10.0, 1.0) AS score
+    FROM documents_fts
+    WHERE documents_fts MATCH :q
+    ORDER BY score, rowid DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+SQLITE_PAGE_QUERY = f"""
+    SELECT d.id, d.filename, d.upload_date,
+           snippet(documents_fts, 1, '{MARK_START}', '{MARK_END}', '…', 20) AS snippet
+    FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+    WHERE documents_fts MATCH :q AND documents_fts.rowid IN :ids
+"""
+
+
+def ensure_search_index(engine):
+    """Creates the full-text index for the current database (idempotent)."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            for ddl in POSTGRES_DDL:
+                conn.execute(text(ddl))
+        elif engine.dialect.name == "sqlite":
+            existing = conn.execute(
+                text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'documents_fts_%'")
+            ).scalar()
+            for ddl in SQLITE_DDL:
+                conn.execute(text(ddl))
+            if existing < 3:
+                # 새로 만든 인덱스에 기존 문서 채우기 / Fill a freshly created index with existing rows
+                conn.execute(text("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')"))
+
+
+def to_fts5_query(q: str) -> str:
+    # 각 단어를 따옴표로 감싸 FTS5 문법 오류 방지 (모든 단어 AND)
+    # Quote every term so user input can't break the FTS5 syntax (all terms must match)
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+def highlight(snippet: str | None) -> str:
+    """HTML-escapes the snippet, then turns the match markers into <mark> tags."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+# 결과 컬럼 타입 (SQLite 는 날짜를 문자열로 돌려주므로 명시) / Result column types (SQLite returns dates as strings)
+RESULT_TYPES = {"id": Integer, "filename": String, "upload_date": DateTime(timezone=True), "rank": Float, "snippet": String}
+
+
+def _search_sqlite(db, query: str, params: dict) -> list:
+    hits = db.execute(text(SQLITE_RANK_QUERY), {"q": query, **params}).all()
+    if not hits:
+        return []
+
+    statement = (
+        text(SQLITE_PAGE_QUERY)
+        .bindparams(bindparam("ids", expanding=True))
+        .columns(**{name: RESULT_TYPES[name] for name in ("id", "filename", "upload_date", "snippet")})
+    )
+    page = {row.id: row for row in db.execute(statement, {"q": query, "ids": [hit.id for hit in hits]})}
+    # bm25 는 낮을수록 관련성 높음 -> 부호를 바꿔 높을수록 좋은 점수로
+    # bm25 is lower-is-better; flip the sign so that a higher rank means a better match
+    return [
+        SimpleNamespace(**page[hit.id]._asdict(), rank=-hit.score)
+        for hit in hits
+        if hit.id in page
+    ]
+
+
+def search_documents(db, q: str, page: int = 1, size: int = 20) -> dict:
+    """
+    Ranked search with highlighted snippets. One extra row is fetched to know
+    whether a next page exists (no COUNT(*) over all matches).
+    """
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    q = q.strip()
+    params = {"limit": size + 1, "offset": (page - 1) * size}
+    if not q:
+        rows = []
+    elif db.bind.dialect.name == "postgresql":
+        rows = db.execute(text(POSTGRES_QUERY).columns(**RESULT_TYPES), {"q": q, **params}).all()
+    else:
+        rows = _search_sqlite(db, to_fts5_query(q), params)
+
+    return {
+        "query": q,
+        "page": page,
+        "size": size,
+        "has_next": len(rows) > size,
+        "results": [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "upload_date": row.upload_date,
+                "rank": round(row.rank, 4),
+                "snippet_html": highlight(row.snippet),
+            }
+            for row in rows[:size]
+        ],
+    }
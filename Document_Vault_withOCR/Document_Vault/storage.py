@@ -0,0 +1,59 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+# [콘텐츠 주소 저장소] 파일을 SHA-256 해시로 저장 -> 같은 파일은 한 번만 저장됨
+# [Content-Addressed Storage] Files are stored by their SHA-256 hash, so identical
+# uploads share one file and never overwrite each other.
+#
+# uploads/ab/cd/abcdef0123...png   (two levels of sharding keep directories small)
+
+UPLOAD_DIR = "uploads"
+CHUNK_SIZE = 1024 * 1024  # 1 MiB: memory use stays bounded whatever the file size
+
+
+@dataclass
+class StoredFile:
+    sha256: str
+    path: str
+    size: int
+
+
+def shard_path(sha256: str, extension: str, root: str = UPLOAD_DIR) -> str:
+    return os.path.join(root, sha256[:2], sha256[2:4], sha256 + extension)
+
+
+def store_stream(source, filename: str, root: str = UPLOAD_DIR) -> StoredFile:
+    """
+    Copies a file-like object to disk in chunks while hashing it (one pass).
+    Blocking: call it from a worker thread (run_in_threadpool), not the event loop.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    tmp_dir = os.path.join(root, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = shard_path(sha256, extension, root)
+        if os.path.exists(path):
+            # 이미 같은 내용이 있음 -> 임시 파일 삭제 / Same content already stored
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)  # atomic: readers never see a partial file
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredFile(sha256=sha256, path=path, size=size)
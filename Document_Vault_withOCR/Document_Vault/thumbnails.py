@@ -0,0 +1,155 @@
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+# [썸네일 캐시] 원본 대신 고정 크기의 WebP/JPEG 미리보기를 만들어 디스크에 캐시
+# [Derived-Asset Cache] Fixed-size WebP/JPEG previews are generated on first request
+# and cached on disk (size-bounded LRU), so list and detail views never ship full scans.
+#
+# derived/ab/<sha256>-<size>.<format>   (keyed by content hash -> never stale, strong ETag)
+
+DERIVED_DIR = os.getenv("VAULT_DERIVED_DIR", "derived")
+# 캐시 최대 크기 (기본 512 MiB) / Disk budget for the cache (default 512 MiB)
+MAX_CACHE_BYTES = int(os.getenv("VAULT_DERIVED_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# 이름 -> 긴 변 픽셀 / Preset name -> longest side in pixels
+SIZES = {"thumb": 160, "preview": 1280}
+# URL 확장자 -> (Pillow 포맷, MIME) / URL extension -> (Pillow format, media type)
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+QUALITY = 80
+
+# 내용 해시로 주소가 정해지므로 영원히 캐시 가능 / Content-addressed URLs never change
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def derived_path(sha256: str, size: str, fmt: str, root: str = DERIVED_DIR) -> str:
+    return os.path.join(root, sha256[:2], f"{sha256}-{size}.{fmt}")
+
+
+def etag_for(sha256: str, size: str, fmt: str) -> str:
+    return f'"{sha256[:32]}-{size}-{fmt}"'
+
+
+def render(source_path: str, target_path: str, size: str, fmt: str):
+    """Resizes the first page of the source and writes it atomically (temp file + rename)."""
+    if source_path.lower().endswith(".pdf"):
+        # PDF 첫 페이지 (OCR 과 같은 렌더링) / First PDF page, rendered like the OCR pipeline does
+        from ocr_pipeline import iter_pages
+
+        image = next(iter_pages(source_path))
+    else:
+        with Image.open(source_path) as opened:
+            opened.draft("RGB", (SIZES[size], SIZES[size]))  # JPEG: decode at reduced scale
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+
+    image.thumbnail((SIZES[size], SIZES[size]), Image.Resampling.LANCZOS)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path))
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            image.save(tmp, format=FORMATS[fmt][0], quality=QUALITY)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class DerivedCache:
+    """
+    Size-bounded LRU over the files in `root`. The index lives in memory and is
+    rebuilt from the directory (oldest access first) at startup; concurrent
+    requests for the same missing asset share one render.
+    """
+
+    def __init__(self, root: str = DERIVED_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, int] = OrderedDict()  # path -> bytes, least recent first
+        self.total_bytes = 0
+        self.lock = Lock()
+        self.pending: dict[str, asyncio.Future] = {}
+        self.renders = 0
+
+    def load(self):
+        os.makedirs(self.root, exist_ok=True)
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_atime, path, stat.st_size))
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            for _, path, size in sorted(files):
+                self.entries[path] = size
+                self.total_bytes += size
+            self._evict()
+
+    def touch(self, path: str) -> bool:
+        """Marks a cached file as recently used; False if it is not (or no longer) on disk."""
+        with self.lock:
+            if path in self.entries and os.path.exists(path):
+                self.entries.move_to_end(path)
+                return True
+            self.total_bytes -= self.entries.pop(path, 0)
+            return False
+
+    def add(self, path: str):
+        with self.lock:
+            self.total_bytes -= self.entries.pop(path, 0)
+            self.entries[path] = os.path.getsize(path)
+            self.total_bytes += self.entries[path]
+            self._evict(keep=path)
+
+    def _evict(self, keep: str | None = None):
+        while self.total_bytes > self.max_bytes and self.entries:
+            path, size = next(iter(self.entries.items()))
+            if path == keep:
+                break
+            del self.entries[path]
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def get(self, sha256: str, source_path: str, size: str, fmt: str) -> str:
+        """Returns the path of the derived file, rendering it once if needed."""
+        path = derived_path(sha256, size, fmt, self.root)
+        if self.touch(path):
+            return path
+
+        # 이미 같은 미리보기를 만드는 중이면 그 결과를 기다림 (한 번만 리사이즈)
+        # Someone is already rendering this asset: wait for that render instead of starting another
+        if path in self.pending:
+            await asyncio.shield(self.pending[path])
+            return path
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[path] = future
+        try:
+            await run_in_threadpool(render, source_path, path, size, fmt)
+            self.renders += 1
+            self.add(path)
+            future.set_result(path)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 기다리는 쪽이 없어도 경고 없음 / Retrieved, so no "never retrieved" warning
+            raise
+        finally:
+            del self.pending[path]
+        return path
+
+
+derived_cache = DerivedCache()
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+# Repo-level shared/ package
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.bench_pages import main
+
+# Load test for the initial page and the JSON API (requests/sec, p50/p99), see shared/bench_pages.py
+#
+# Before:  RENT_PAGE_CACHE=0 uvicorn main:app --port 8000
+# After:   RENT_FAST_JSON=1 uvicorn main:app --port 8000
+# Run:     python bench_pages.py --url http://127.0.0.1:8000
+
+SAMPLE = {"gross_annual_salary": 85000, "monthly_rent": 1500, "canton": "ZH"}
+
+API = {
+    "POST /api/calculate": {"method": "POST", "url": "/api/calculate", "json": SAMPLE},
+}
+
+if __name__ == "__main__":
+    main("Rent calculator", API)
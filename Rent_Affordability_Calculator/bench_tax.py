@@ -0,0 +1,58 @@
+import argparse
+import random
+import timeit
+
+import numpy as np
+
+from services.tax_engine import tax_engine
+
+# Microbenchmark: progressive tax-table lookup vs the old flat dict lookup
+#
+# Run:   python bench_tax.py [-n 1000000]
+
+# The flat rates RentService used before the tax tables (for comparison only)
+OLD_CANTON_DEDUCTION_RATES = {"ZH": 0.18, "BE": 0.22, "GE": 0.25, "GR": 0.17}
+OLD_DEFAULT_RATE = 0.18
+
+
+def old_deduction(monthly_gross, canton):
+    return monthly_gross * OLD_CANTON_DEDUCTION_RATES.get(canton, OLD_DEFAULT_RATE)
+
+
+def per_call_ns(func, rows, repeat):
+    # Best of `repeat` runs over all rows, divided by the number of rows
+    best = min(timeit.repeat(lambda: [func(g, c) for g, c in rows], number=1, repeat=repeat))
+    return best / len(rows) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tax engine microbenchmark")
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000, help="Rows for the batched run")
+    parser.add_argument("--scalar-rows", type=int, default=100_000, help="Rows for the scalar runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = timeit.default_timer()
+    tax_engine.load()
+    print(f"Compiled {len(tax_engine.cantons())} cantons in {(timeit.default_timer() - start) * 1000:.1f} ms")
+
+    rng = random.Random(42)
+    codes = list(tax_engine.cantons())
+    rows = [(rng.uniform(2000, 20000), rng.choice(codes)) for _ in range(args.scalar_rows)]
+
+    old = per_call_ns(old_deduction, rows, args.repeat)
+    new = per_call_ns(tax_engine.monthly_deduction, rows, args.repeat)
+
+    gross = np.random.default_rng(42).uniform(2000, 20000, args.rows)
+    cantons = np.random.default_rng(7).choice(codes, args.rows)
+    best = min(timeit.repeat(lambda: tax_engine.monthly_deduction_bulk(gross, cantons), number=1, repeat=args.repeat))
+    batched = best / args.rows * 1e9
+
+    print(f"{'Path':<28} {'ns/call':>10}")
+    print(f"{'flat dict lookup (old)':<28} {old:>10.0f}")
+    print(f"{'tax tables, scalar':<28} {new:>10.0f}")
+    print(f"{'tax tables, batched':<28} {batched:>10.1f}   ({args.rows:,} rows in {best * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,61 @@
-from fastapi import FastAPI, Request, Form
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from importlib.util import find_spec
+from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, JSONResponse, ORJSONResponse
 
 # Import our custom logic
-from schemas.rent import SalaryInfo, AffordabilityResult
+from schemas.rent import SalaryInfo, AffordabilityResult, BulkSalaryInfo, BulkAffordabilityResult
 from services.rent_service import RentService
+from services.bulk_io import read_columns_csv, read_columns_arrow, dump_columns
+from services.tax_engine import tax_engine
 
-app = FastAPI(title="Swiss Rent Affordability Calculator UI")
+# Repo-level shared/ package (metrics middleware, cached initial page)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.metrics import instrument
+from shared.page_cache import StaticPage
+
+# RENT_PAGE_CACHE=0 re-renders the initial page on every request (e.g. for before/after load tests)
+PAGE_CACHE = os.getenv("RENT_PAGE_CACHE", "1") == "1"
+
+# Opt-in: RENT_FAST_JSON=1 serializes the JSON API responses with orjson (if installed)
+FAST_JSON = os.getenv("RENT_FAST_JSON", "0") == "1" and find_spec("orjson") is not None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the tax tables once at startup, not on the first request
+    tax_engine.load()
+    # The initial page (no result yet) never changes, so render and compress it once
+    app.state.initial_page = StaticPage(
+        templates.get_template("index.html").render(request=None, result=None, cantons=tax_engine.cantons())
+    )
+    yield
+
+app = FastAPI(
+    title="Swiss Rent Affordability Calculator UI",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if FAST_JSON else JSONResponse,
+)
+
+# Per-route latency histograms and in-flight requests at GET /metrics (Prometheus text format)
+instrument(app)
 
 # Specify the directory where HTML files are located
 templates = Jinja2Templates(directory="templates")
 
 # 1. Display the main screen (GET endpoint)
 @app.get("/", response_class=HTMLResponse, summary="Display Rent Analyzer UI")    # 웹주소+/ 에들어가면 HTML에있는 UI를 불러오고 summary 문서상 확인 함 그리고 템플릿인 index를 반환하기 
-def read_root(request: Request):
+async def read_root(request: Request):
     """
-    Renders the main HTML page ('index.html').
+    Serves the main HTML page ('index.html'), pre-rendered at startup.
+    Supports gzip/brotli and conditional requests (If-None-Match -> 304).
     """
-    return templates.TemplateResponse("index.html", {"request": request, "result": None})
+    if PAGE_CACHE:
+        return request.app.state.initial_page.response(request)
+    return templates.TemplateResponse("index.html", {"request": request, "result": None, "cantons": tax_engine.cantons()})
 
 # 2. Handle calculation submission from the UI (POST endpoint)
 @app.post("/calculate_ui", response_class=HTMLResponse, summary="Process UI form submission and calculate affordability")
@@ -25,7 +63,8 @@ def calculate_ui(
     request: Request,
     gross_annual_salary: float = Form(..., description="Annual Gross Salary in CHF"),
     monthly_rent: float = Form(..., description="Monthly Rent in CHF"),
-    canton: str = Form(..., description="Canton of Residence (e.g., ZH, BE)")
+    canton: str = Form(..., description="Canton of Residence (e.g., ZH, BE)"),
+    municipality: str = Form("", description="Municipality of Residence (optional)")
 ):
     """
     Receives form data, calculates affordability, and re-renders the page with the results.
@@ -34,7 +73,8 @@ def calculate_ui(
     input_data = SalaryInfo(
         gross_annual_salary=gross_annual_salary,
         monthly_rent=monthly_rent,
-        canton=canton
+        canton=canton,
+        municipality=municipality or None
     )
     
     # 2. Call the core service logic (reusable!)
@@ -43,7 +83,8 @@ def calculate_ui(
     # 3. Re-render the HTML page including the result data
     return templates.TemplateResponse("index.html", {
         "request": request, 
-        "result": result
+        "result": result,
+        "cantons": tax_engine.cantons()
     })
 
 # (Optional) API-only endpoint maintained for programmatic access
@@ -52,4 +93,43 @@ def calculate_api(info: SalaryInfo):
     """
     Accepts a JSON payload (SalaryInfo) and returns the affordability check result.
     """
-    return RentService.calculate_affordability(info)
\ No newline at end of file
+    return RentService.calculate_affordability(info)
+
+def _bulk_response(salaries, rents, cantons, municipalities=None) -> Response:
+    """
+    Runs the vectorized calculation and returns compact columnar JSON
+    (the arrays are serialized directly, without per-row models).
+    """
+    result = RentService.calculate_affordability_bulk(salaries, rents, cantons, municipalities)
+    body = {
+        "rows": len(result["is_affordable"]),
+        "affordable_count": int(result["is_affordable"].sum()),
+        **result,
+    }
+    return Response(content=dump_columns(body), media_type="application/json")
+
+# Bulk endpoint: columnar JSON arrays in, columnar arrays out
+@app.post("/api/calculate/bulk", response_model=BulkAffordabilityResult, summary="Calculate affordability for many rows (columnar JSON)")
+def calculate_bulk(info: BulkSalaryInfo):
+    """
+    Accepts parallel arrays (salaries, rents, cantons) and scores every row in one vectorized pass.
+    """
+    return _bulk_response(info.gross_annual_salary, info.monthly_rent, info.canton, info.municipality)
+
+# Bulk endpoint: CSV or Arrow file upload
+@app.post("/api/calculate/bulk/upload", response_model=BulkAffordabilityResult, summary="Calculate affordability for a CSV or Arrow upload")
+def calculate_bulk_upload(file: UploadFile = File(..., description="CSV with a header row, or an Arrow IPC file")):
+    """
+    Accepts a CSV (gross_annual_salary, monthly_rent, canton, municipality) or Arrow upload with the same columns.
+    """
+    data = file.file.read()
+    is_arrow = (file.filename or "").endswith((".arrow", ".feather", ".arrows")) or "arrow" in (file.content_type or "")
+    try:
+        columns = read_columns_arrow(data) if is_arrow else read_columns_csv(data)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    for name in ("canton", "municipality"):
+        if isinstance(columns[name], list) and len(columns[name]) != len(columns["gross_annual_salary"]):
+            raise HTTPException(status_code=400, detail=f"{name} must have one entry per row")
+    return _bulk_response(columns["gross_annual_salary"], columns["monthly_rent"], columns["canton"], columns["municipality"])
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 # [Input] Data sent by the user
 class SalaryInfo(BaseModel):
@@ -6,6 +6,7 @@ class SalaryInfo(BaseModel):
     gross_annual_salary: float = Field(..., title="Annual Gross Salary", description="Pre-tax annual salary in CHF", example=85000)
     monthly_rent: float = Field(..., title="Monthly Rent", description="The desired monthly rent in CHF", example=1500)
     canton: str = Field("ZH", title="Canton", description="Region (e.g., ZH, BE, GR)", example="GR")
+    municipality: str | None = Field(None, title="Municipality", description="Municipality (Gemeinde); defaults to the canton capital", example="Chur")
 
 # [Output] Calculation result returned by the service
 class AffordabilityResult(BaseModel):
@@ -14,4 +15,33 @@ class AffordabilityResult(BaseModel):
     monthly_net_income: float = Field(..., title="Estimated Monthly Net Income")
     social_security_deduction: float = Field(..., title="Social Security Deduction Amount")
     is_affordable: bool = Field(..., title="Affordability Status")
-    message: str = Field(..., title="Guidance Message")
\ No newline at end of file
+    message: str = Field(..., title="Guidance Message")
+
+# [Input] Columnar bulk input (one entry per row)
+class BulkSalaryInfo(BaseModel):
+    """Schema for scoring many salary/rent rows at once, as parallel arrays."""
+    gross_annual_salary: list[float] = Field(..., title="Annual Gross Salaries", description="Pre-tax annual salaries in CHF", example=[85000, 62000])
+    monthly_rent: list[float] = Field(..., title="Monthly Rents", description="Monthly rents in CHF", example=[1500, 2100])
+    canton: list[str] | str = Field("ZH", title="Cantons", description="One canton per row, or a single canton for all rows", example=["ZH", "GR"])
+    municipality: list[str] | str | None = Field(None, title="Municipalities", description="One municipality per row, or a single one for all rows (defaults to the canton capital)", example=["Winterthur", "Chur"])
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        rows = len(self.gross_annual_salary)
+        if len(self.monthly_rent) != rows:
+            raise ValueError("gross_annual_salary and monthly_rent must have the same length")
+        if isinstance(self.canton, list) and len(self.canton) != rows:
+            raise ValueError("canton must be a single value or have one entry per row")
+        if isinstance(self.municipality, list) and len(self.municipality) != rows:
+            raise ValueError("municipality must be a single value or have one entry per row")
+        return self
+
+# [Output] Columnar bulk result (same row order as the input)
+class BulkAffordabilityResult(BaseModel):
+    """Schema for the bulk affordability results, as parallel arrays."""
+    rows: int = Field(..., title="Number of Rows")
+    affordable_count: int = Field(..., title="Number of Affordable Rows")
+    monthly_gross_income: list[float] = Field(..., title="Monthly Gross Income")
+    monthly_net_income: list[float] = Field(..., title="Estimated Monthly Net Income")
+    social_security_deduction: list[float] = Field(..., title="Social Security Deduction Amount")
+    is_affordable: list[bool] = Field(..., title="Affordability Status")
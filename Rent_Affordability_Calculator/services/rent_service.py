@@ -1,33 +1,27 @@
+import numpy as np
+
 from schemas.rent import SalaryInfo, AffordabilityResult
+from services.tax_engine import tax_engine
 
 class RentService:
-    # Estimated Total Deduction Rates (Social Security + Approx. Tax)
-    # Note: These are rough estimates for a single person. 
-    # Real taxes vary by municipality (Gemeinde), age, and marital status.
-    CANTON_DEDUCTION_RATES = {
-        "ZH": 0.18,  # Zürich (Moderate)
-        "BE": 0.22,  # Bern (High tax region)
-        "GE": 0.25,  # Geneva (High tax region)
-        "GR": 0.17,  # Graubünden (Generally lower tax) - ADDED
-    }
-    
-    # Default rate if canton is not found
-    DEFAULT_RATE = 0.18 
+    # Estimated Total Deductions (Social Security + Federal/Cantonal/Municipal Tax)
+    # come from the progressive tables in data/tax_tables.json (see tax_engine.py).
+    # Note: These are rough estimates for a single person.
+    # Real taxes also vary by age, marital status, and personal deductions.
 
     @staticmethod
     def calculate_affordability(data: SalaryInfo) -> AffordabilityResult:
         """
-        Calculates affordability using canton-specific deduction estimates.
+        Calculates affordability using progressive canton/municipality deduction tables.
         """
         # 1. Convert Annual to Monthly Gross
         monthly_gross = data.gross_annual_salary / 12
         
-        # 2. Find the deduction rate for the selected Canton
-        # If the canton is not in our list, use the default rate.
-        rate = RentService.CANTON_DEDUCTION_RATES.get(data.canton, RentService.DEFAULT_RATE)
+        # 2. Look up the deduction in the selected Canton (and Municipality)
+        # Unknown cantons fall back to ZH, unknown municipalities to the canton capital.
+        deduction = tax_engine.monthly_deduction(monthly_gross, data.canton, data.municipality)
         
-        # 3. Calculate Deduction & Net Income
-        deduction = monthly_gross * rate
+        # 3. Calculate Net Income
         monthly_net = monthly_gross - deduction
         
         # 4. Apply the '1/3 Rent Rule'
@@ -46,4 +40,33 @@ class RentService:
             social_security_deduction=round(deduction, 2),
             is_affordable=is_affordable,
             message=msg
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def calculate_affordability_bulk(salaries, rents, cantons, municipalities=None) -> dict:
+        """
+        Vectorized version of calculate_affordability for many rows at once.
+        Takes parallel arrays (cantons/municipalities may also be a single string)
+        and returns a dict of NumPy arrays in the same row order.
+        """
+        salaries = np.asarray(salaries, dtype=np.float64)
+        rents = np.asarray(rents, dtype=np.float64)
+
+        # 1. Convert Annual to Monthly Gross
+        monthly_gross = salaries / 12
+
+        # 2. Look up the deduction per row (one batched search over all tables)
+        deduction = tax_engine.monthly_deduction_bulk(monthly_gross, cantons, municipalities)
+
+        # 3. Calculate Net Income
+        monthly_net = monthly_gross - deduction
+
+        # 4. Apply the '1/3 Rent Rule'
+        is_affordable = rents <= monthly_net / 3
+
+        return {
+            "monthly_gross_income": np.round(monthly_gross, 2),
+            "monthly_net_income": np.round(monthly_net, 2),
+            "social_security_deduction": np.round(deduction, 2),
+            "is_affordable": is_affordable,
+        }
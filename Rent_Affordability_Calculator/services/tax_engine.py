@@ -0,0 +1,191 @@
+import json
+import os
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+# Progressive deduction engine (Social Security + Federal + Cantonal + Municipal tax)
+# The bracket tables are compiled once into cumulative lookup arrays, so every
+# computation is one binary search plus one multiply.
+
+TAX_TABLES_FILE = os.getenv(
+    "RENT_TAX_TABLES_FILE",
+    str(Path(__file__).parent.parent / "data" / "tax_tables.json"),
+)
+
+# Canton used when the requested one is unknown (same fallback as the old flat rates)
+DEFAULT_CANTON = "ZH"
+
+# Incomes are shifted by table_id * TABLE_STRIDE, so all tables fit in one sorted array
+# (monthly incomes above the stride are clipped to it)
+TABLE_STRIDE = 1e8
+
+
+def _merge_brackets(*schedules) -> tuple[list[float], list[float]]:
+    """
+    Merges several [[lower_bound, marginal_rate], ...] schedules (each weighted)
+    into one list of breakpoints with the summed marginal rate of each segment.
+    """
+    bounds = sorted({bound for schedule, _ in schedules for bound, _ in schedule})
+    rates = []
+    for bound in bounds:
+        rate = 0.0
+        for schedule, weight in schedules:
+            i = bisect_right([b for b, _ in schedule], bound) - 1
+            rate += schedule[i][1] * weight if i >= 0 else 0.0
+        rates.append(rate)
+    return bounds, rates
+
+
+class TaxTable:
+    """
+    One compiled table (canton + municipality), expressed in monthly gross income.
+    deduction(x) = base[i] + rate[i] * (x - bounds[i]) with i = last bound <= x.
+    """
+
+    def __init__(self, bounds: list[float], rates: list[float]):
+        self.bounds = bounds
+        self.rates = rates
+        # Cumulative deduction at the start of every segment
+        self.base = [0.0]
+        for i in range(1, len(bounds)):
+            self.base.append(self.base[-1] + rates[i - 1] * (bounds[i] - bounds[i - 1]))
+
+    def deduction(self, monthly_gross: float) -> float:
+        if monthly_gross <= 0:
+            return 0.0
+        i = bisect_right(self.bounds, monthly_gross) - 1
+        return self.base[i] + self.rates[i] * (monthly_gross - self.bounds[i])
+
+
+class TaxEngine:
+    """
+    Loads the bracket tables of all cantons from a JSON file and compiles one
+    TaxTable per (canton, municipality). Call load() at startup; the first
+    computation loads the file otherwise.
+    """
+
+    def __init__(self, path: str = TAX_TABLES_FILE):
+        self.path = path
+        self._loaded = False
+        self._tables: list[TaxTable] = []
+        self._ids: dict[tuple[str, str], int] = {}   # (canton, normalized municipality) -> table id
+        self._default_ids: dict[str, int] = {}       # canton -> table id of its capital
+        self._default_tables: dict[str, TaxTable] = {}
+        self._names: dict[str, str] = {}             # canton -> full name
+        self._municipalities: dict[str, list[str]] = {}
+        # Sorted canton codes and their capital's table id, for batched canton lookups
+        self._codes = np.empty(0, dtype=str)
+        self._code_ids = np.empty(0)
+        # Flat arrays of every table (shifted by table id) for batched lookups
+        self._flat_keys = np.empty(0)
+        self._flat_bounds = np.empty(0)
+        self._flat_base = np.empty(0)
+        self._flat_rates = np.empty(0)
+
+    def load(self):
+        if self._loaded:
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        social_security = [[0, data["social_security_rate"]]]
+        taxable_share = data["taxable_share"]
+        # Brackets are defined on taxable income; convert the bounds to gross income
+        federal = [[bound / taxable_share, rate] for bound, rate in data["federal_brackets"]]
+
+        for canton, info in data["cantons"].items():
+            cantonal = [[bound / taxable_share, rate] for bound, rate in info["brackets"]]
+            self._names[canton] = info["name"]
+            self._municipalities[canton] = list(info["municipalities"])
+
+            for municipality, multiplier in info["municipalities"].items():
+                bounds, rates = _merge_brackets(
+                    (social_security, 1.0),
+                    (federal, taxable_share),
+                    (cantonal, taxable_share * (info["canton_multiplier"] + multiplier)),
+                )
+                table_id = len(self._tables)
+                self._tables.append(TaxTable([b / 12 for b in bounds], rates))
+                self._ids[(canton, municipality.casefold())] = table_id
+                self._default_ids.setdefault(canton, table_id)
+
+        self._default_tables = {canton: self._tables[i] for canton, i in self._default_ids.items()}
+        self._codes = np.array(sorted(self._default_ids))
+        self._code_ids = np.array([self._default_ids[code] for code in self._codes], dtype=np.float64)
+        self._flat_bounds = np.concatenate([table.bounds for table in self._tables])
+        self._flat_keys = np.concatenate([
+            np.asarray(table.bounds) + table_id * TABLE_STRIDE for table_id, table in enumerate(self._tables)
+        ])
+        self._flat_base = np.concatenate([table.base for table in self._tables])
+        self._flat_rates = np.concatenate([table.rates for table in self._tables])
+        self._loaded = True
+
+    def cantons(self) -> dict[str, str]:
+        """Canton code -> full name, in file order."""
+        self.load()
+        return dict(self._names)
+
+    def municipalities(self, canton: str) -> list[str]:
+        self.load()
+        return list(self._municipalities.get(canton, []))
+
+    def table_id(self, canton: str, municipality: str | None = None) -> int:
+        """Unknown cantons fall back to DEFAULT_CANTON, unknown municipalities to the capital."""
+        self.load()
+        if canton not in self._default_ids:
+            canton = DEFAULT_CANTON
+        if municipality:
+            table_id = self._ids.get((canton, municipality.strip().casefold()))
+            if table_id is not None:
+                return table_id
+        return self._default_ids[canton]
+
+    def monthly_deduction(self, monthly_gross: float, canton: str, municipality: str | None = None) -> float:
+        """Scalar path: total monthly deduction for one person."""
+        if not self._loaded:
+            self.load()
+        if municipality:
+            table = self._tables[self.table_id(canton, municipality)]
+        else:
+            table = self._default_tables.get(canton) or self._default_tables[DEFAULT_CANTON]
+        return table.deduction(monthly_gross)
+
+    def monthly_deduction_bulk(self, monthly_gross, cantons, municipalities=None) -> np.ndarray:
+        """
+        Batched path: one np.searchsorted over the flat arrays of all tables.
+        cantons / municipalities may be arrays or a single string for every row.
+        """
+        self.load()
+        monthly_gross = np.maximum(np.asarray(monthly_gross, dtype=np.float64), 0.0)
+        table_ids = self._table_ids_bulk(cantons, municipalities, monthly_gross.shape)
+
+        # Clipped only for the lookup key, so huge incomes stay in their own table's top bracket
+        keys = np.minimum(monthly_gross, TABLE_STRIDE - 1) + table_ids * TABLE_STRIDE
+        i = np.searchsorted(self._flat_keys, keys, side="right") - 1
+        return self._flat_base[i] + self._flat_rates[i] * (monthly_gross - self._flat_bounds[i])
+
+    def _table_ids_bulk(self, cantons, municipalities, shape) -> np.ndarray:
+        # Each distinct canton/municipality is resolved once, then broadcast back to its rows
+        scalar = isinstance(cantons, str) and (municipalities is None or isinstance(municipalities, str))
+        if scalar:
+            return np.full(shape, self.table_id(cantons, municipalities), dtype=np.float64)
+
+        cantons = np.broadcast_to(np.asarray(cantons, dtype=str), shape)
+        if municipalities is None:
+            # Binary search in the sorted canton codes (faster than np.unique on strings)
+            i = np.minimum(np.searchsorted(self._codes, cantons), len(self._codes) - 1)
+            return np.where(self._codes[i] == cantons, self._code_ids[i], self._default_ids[DEFAULT_CANTON])
+
+        unique_cantons, canton_idx = np.unique(cantons, return_inverse=True)
+
+        unique_munis, muni_idx = np.unique(np.broadcast_to(np.asarray(municipalities, dtype=str), shape), return_inverse=True)
+        ids = np.array(
+            [[self.table_id(c, m) for m in unique_munis] for c in unique_cantons], dtype=np.float64
+        )
+        return ids[canton_idx, muni_idx]
+
+
+tax_engine = TaxEngine()
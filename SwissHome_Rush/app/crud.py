@@ -0,0 +1,26 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import app.models as models
+
+async def list_properties_with_counts(db: AsyncSession):
+    """
+    [ENG] Load every property together with its current booking count in ONE query
+          (LEFT JOIN + GROUP BY) instead of one COUNT(*) per property.
+    [KOR] 매물 목록과 예약 수를 한 번의 쿼리로 가져옵니다 (N+1 제거)
+    """
+    booking_counts = (
+        select(models.Booking.property_id, func.count(models.Booking.id).label("booked"))
+        .group_by(models.Booking.property_id)
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(models.Property, func.coalesce(booking_counts.c.booked, 0))
+        .outerjoin(booking_counts, booking_counts.c.property_id == models.Property.id)
+        .order_by(models.Property.id)
+    )).all()
+
+    properties = []
+    for prop, booked in rows:
+        prop.current_count = booked  # 화면에 보여주기 위해 임시로 숫자를 붙임
+        properties.append(prop)
+    return properties
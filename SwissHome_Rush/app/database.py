@@ -1,28 +1,40 @@
-from sqlalchemy import create_engine
+import os
+import sys
+from pathlib import Path
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+
+# [ENG] Make the repo-level shared/ package importable (in Docker it is mounted at /code/shared)
+# [KOR] 저장소 루트의 공용 모듈 (shared/) 을 import 할 수 있도록
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.db import PoolSettings, make_engine
 
 # [ENG] Database URL
 # [KOR] 데이터베이스 연결 주소
-SQLALCHEMY_DATABASE_URL = "postgresql://admin:password@db:5432/swiss_home"
+# [KOR] asyncpg 드라이버로 비동기 연결 (스레드 대신 이벤트 루프에서 대기)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "SWISSHOME_DATABASE_URL", "postgresql+asyncpg://admin:password@db:5432/swiss_home"
+)
 
 # [ENG] Create Database Engine with increased pool size for the "War"
+#       These are only defaults: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, ... override them
 # [KOR] 전쟁(동시 접속)을 대비해 커넥션 풀 크기를 20으로 늘립니다.
 # (기본값은 5라서, 15명이 동시에 오면 에러가 납니다)
-engine = create_engine(
+engine = make_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_size=20,      # [NEW] 한 번에 20명까지 입장 가능
-    max_overflow=0,    # [NEW] 추가 예비 인원은 두지 않음
-    pool_timeout=30    # [NEW] 자리가 없으면 30초까지 대기
+    name="swisshome",
+    defaults=PoolSettings(
+        pool_size=20,      # [NEW] 한 번에 20명까지 입장 가능
+        max_overflow=0,    # [NEW] 추가 예비 인원은 두지 않음
+        pool_timeout=30,   # [NEW] 자리가 없으면 30초까지 대기
+    ),
+    is_async=True,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
\ No newline at end of file
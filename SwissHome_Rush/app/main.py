@@ -1,24 +1,84 @@
-import time
+import os
+import asyncio
 import random
-from fastapi import FastAPI, Request, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Depends, Header, HTTPException
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.database import engine, Base, get_db
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import engine, Base, get_db, SessionLocal
+from shared.idempotency import IdempotencyStore, Outcome
+from shared.metrics import instrument, timer
+from shared.waiting_room import Rejected, WaitingRoom
 import app.models as models
+from app.crud import list_properties_with_counts
 from app.sbb import SBBAgent
+from app.slot_cache import SlotCounter, BookingWriter
 
-# [KOR] DB 테이블 생성 (없으면 자동 생성)
-models.Base.metadata.create_all(bind=engine)
+# [ENG] Booking mode: "lock" (SELECT ... FOR UPDATE per click) or
+#       "cache" (in-memory slot counter + write-behind batch inserts)
+# [KOR] 예약 방식 선택: lock (행 잠금) / cache (메모리 카운터 + 백그라운드 일괄 저장)
+BOOKING_MODE = os.getenv("BOOKING_MODE", "lock")
+if BOOKING_MODE not in ("lock", "cache"):
+    raise RuntimeError(f"Unknown BOOKING_MODE '{BOOKING_MODE}'. Choose 'lock' or 'cache'.")
 
-app = FastAPI(title="SwissHome Rush")
+# [ENG] Waiting room in front of lock mode: only remaining slots + WAITING_ROOM_MARGIN clicks
+#       per property reach the row lock, the rest are turned away from memory with their
+#       queue position. (Cache mode already decides every click in memory.)
+# [KOR] 대기실 (lock 모드 앞단): 남은 자리 + 여유분 만큼만 락까지 보내고 나머지는 즉시 거절
+WAITING_ROOM = os.getenv("WAITING_ROOM", "off")
+if WAITING_ROOM not in ("on", "off"):
+    raise RuntimeError(f"Unknown WAITING_ROOM '{WAITING_ROOM}'. Choose 'on' or 'off'.")
+
+slot_counter = SlotCounter()
+booking_writer = BookingWriter()
+waiting_room = WaitingRoom("swisshome", slot_counter.load) if WAITING_ROOM == "on" else None
+
+# [ENG] Idempotency-Key header: a retried click gets the first outcome back without the row lock.
+#       Lock mode commits the key with the booking; cache mode keeps it in memory like its counter
+#       and never queries idempotency_keys.
+# [KOR] 같은 Idempotency-Key 로 다시 누른 예약은 처음 결과를 그대로 받음 (락 없이, 캐시 모드는 DB 조회 없음)
+idempotency = IdempotencyStore(
+    "swisshome", models.idempotency_keys, SessionLocal, persistent=BOOKING_MODE == "lock"
+)
+BACK_TO_LISTING = Outcome(303, {"location": "/properties"})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # [KOR] DB 테이블 생성 (없으면 자동 생성)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        # [KOR] 예전 버전이 만든 bookings 테이블에도 매물별 COUNT 용 인덱스 추가
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bookings_property_id ON bookings (property_id)"))
+
+    # [KOR] 샘플 데이터는 요청마다가 아니라 서버 시작 시 한 번만 확인
+    async with SessionLocal() as db:
+        await initialize_data(db)
+
+    if BOOKING_MODE == "cache":
+        # [KOR] 서버 시작 시 DB 기준으로 카운터 재구성 후 writer 시작
+        loaded = await slot_counter.rebuild()
+        booking_writer.start()
+        print(f"⚡ Slot cache ready ({loaded} properties)")
+    yield
+    if BOOKING_MODE == "cache":
+        # [KOR] 종료 전에 남은 예약을 모두 DB에 저장
+        await booking_writer.stop()
+    await engine.dispose()
+
+app = FastAPI(title="SwissHome Rush", lifespan=lifespan)
 templates = Jinja2Templates(directory="app/templates")
 
-def initialize_data(db: Session):
+# [ENG] GET /metrics: per-route latency, in-flight requests, lock wait/hold timers, pool stats
+# [KOR] 경로별 지연 시간, 처리 중 요청 수, 락 대기/보유 시간, 커넥션 풀 상태 (Prometheus 형식)
+instrument(app)
+
+async def initialize_data(db: AsyncSession):
     """
     [KOR] DB가 비어있으면 초기 샘플 데이터를 생성하는 함수
     """
-    if db.query(models.Property).count() == 0:
+    if await db.scalar(select(func.count(models.Property.id))) == 0:
         sample_properties = [
             models.Property(
                 name="Zurich Lakeview Penthouse",
@@ -46,12 +106,11 @@ def initialize_data(db: Session):
             )
         ]
         db.add_all(sample_properties)
-        db.commit()
+        await db.commit()
         print("✅ Sample Data Created!")
 
 @app.get("/")
-def read_root(request: Request, db: Session = Depends(get_db)):
-    initialize_data(db)
+async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {
         "request": request, 
         "project_name": "SwissHome Rush", 
@@ -60,42 +119,117 @@ def read_root(request: Request, db: Session = Depends(get_db)):
     })
 
 @app.get("/properties")
-def show_properties(request: Request, db: Session = Depends(get_db)):
-    # 1. 데이터 확인
-    initialize_data(db)
-    
-    # 2. 모든 집 목록 가져오기
-    properties = db.query(models.Property).all()
-    
-    # 3. [NEW] 각 집마다 현재 예약된 인원 수 계산해서 붙여주기
-    for p in properties:
-        current_count = db.query(models.Booking).filter(models.Booking.property_id == p.id).count()
-        p.current_count = current_count  # 화면에 보여주기 위해 임시로 숫자를 붙임
-        
+async def show_properties(request: Request, db: AsyncSession = Depends(get_db)):
+    # [NEW] 모든 집 목록 + 현재 예약된 인원 수를 한 번의 집계 쿼리로 가져오기
+    properties = await list_properties_with_counts(db)
+
     return templates.TemplateResponse("booking.html", {"request": request, "properties": properties})
 
+@app.get("/book/{property_id}/status")
+async def booking_status(property_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    [ENG] Booking count of one property as JSON (used by the load-test checks).
+          In cache mode, `pending` bookings are accepted but not yet written.
+    [KOR] 매물 한 곳의 예약 현황 (부하 테스트 검증용)
+    """
+    max_slots = await db.scalar(select(models.Property.max_slots).where(models.Property.id == property_id))
+    if max_slots is None:
+        raise HTTPException(status_code=404, detail="House not found")
+    bookings = await db.scalar(
+        select(func.count(models.Booking.id)).where(models.Booking.property_id == property_id)
+    )
+    return {
+        "mode": BOOKING_MODE,
+        "max_slots": max_slots,
+        "current_bookings": bookings,
+        "pending": booking_writer.pending() if BOOKING_MODE == "cache" else 0,
+        "is_overbooked": bookings > max_slots,
+    }
+
 @app.post("/book/{property_id}")
-def book_viewing(property_id: int, db: Session = Depends(get_db)):
+async def book_viewing(
+    property_id: int,
+    idempotency_key: str | None = Header(None, max_length=255, description="Retries with the same key get the first outcome"),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    [Flow] 동시성 제어가 적용된 예약 로직
+    [Flow] 동시성 제어가 적용된 예약 로직 (+ 멱등성 키, 대기실)
     """
+    try:
+        if idempotency_key is None:
+            await book(property_id, db)
+            return RedirectResponse(url=BACK_TO_LISTING.body["location"], status_code=303)
+
+        request = f"POST /book/{property_id}"
+
+        async def run(key: str) -> Outcome:
+            staged = False
+
+            async def on_booked(db: AsyncSession):
+                nonlocal staged
+                await idempotency.stage(db, key, request, BACK_TO_LISTING)  # 예약과 같은 트랜잭션 / Same transaction
+                staged = True
+
+            await book(property_id, db, on_booked)
+            if not staged and BOOKING_MODE == "lock":
+                await idempotency.save(key, request, BACK_TO_LISTING)  # 매진 / Sold out
+            return BACK_TO_LISTING
+
+        outcome, replayed = await idempotency.handle(idempotency_key, request, run)
+        return outcome.response(replayed)
+
+    except Rejected as rejected:
+        # [KOR] DB 를 거치지 않고 대기 순번과 함께 목록으로 돌려보냄 (저장하지 않음 -> 재시도 가능)
+        # [ENG] Back to the listing with the queue position, without touching the DB (not stored: retries may get in)
+        ticket = rejected.ticket
+        print(f"🚪 Waiting room: #{ticket.position} turned away ({ticket.remaining} slots left)")
+        return RedirectResponse(
+            url=f"/properties?property={property_id}&queue_position={ticket.position}&remaining={ticket.remaining}",
+            status_code=303,
+        )
+
+async def book(property_id: int, db: AsyncSession, on_booked=None):
+    """
+    [ENG] Books one slot with the configured mode. on_booked(db) runs in the booking's
+          transaction right before the commit (lock mode). Raises Rejected (waiting room),
+          HTTPException 404, or the database error itself.
+    [KOR] 설정된 방식으로 예약 (실패는 예외로 전달, 삼키지 않음)
+    """
+    if BOOKING_MODE == "cache":
+        await book_viewing_cached(property_id)
+    elif waiting_room is None:
+        await book_viewing_locked(property_id, db, on_booked=on_booked)
+    else:
+        async with waiting_room.admit(property_id) as ticket:
+            await book_viewing_locked(property_id, db, ticket, on_booked)
+
+async def book_viewing_locked(property_id: int, db: AsyncSession, ticket=None, on_booked=None) -> bool:
+    """
+    [Flow] 행 잠금 (SELECT ... FOR UPDATE) 으로 인원을 확인하고 예약하는 로직
+    Returns True when booked, False when sold out.
+    """
+    hold = timer("book_lock_hold")
     try:
         # 1. Lock (줄 세우기)
-        target_property = db.query(models.Property)\
-                            .filter(models.Property.id == property_id)\
-                            .with_for_update()\
-                            .first()
+        with timer("book_lock_wait"):
+            target_property = await db.scalar(
+                select(models.Property)
+                .where(models.Property.id == property_id)
+                .with_for_update()
+            )
+        hold.start()  # 커밋/롤백까지 락 보유 / Lock held until commit or rollback
         
         if not target_property:
             raise HTTPException(status_code=404, detail="House not found")
 
         # 2. Count (인원 확인)
-        current_bookings = db.query(models.Booking)\
-                             .filter(models.Booking.property_id == property_id)\
-                             .count()
+        current_bookings = await db.scalar(
+            select(func.count(models.Booking.id))
+            .where(models.Booking.property_id == property_id)
+        )
         
-        # 3. Delay (경쟁 상황 시뮬레이션)
-        time.sleep(0.1)
+        # 3. Delay (경쟁 상황 시뮬레이션, 이벤트 루프는 막지 않음)
+        await asyncio.sleep(0.1)
 
         # 4. Decide (판정)
         if current_bookings < target_property.max_slots:
@@ -104,14 +238,47 @@ def book_viewing(property_id: int, db: Session = Depends(get_db)):
                 user_name=f"User-{random.randint(1000,9999)}"
             )
             db.add(new_booking)
-            db.commit()
+            if on_booked is not None:
+                await on_booked(db)
+            await db.commit()
+            hold.stop()
+            if ticket is not None:
+                ticket.booked()
             print(f"✅ Booking Success! ({current_bookings + 1}/5)")
-        else:
-            db.rollback()
-            print(f"❌ Sold Out! (5/5)")
-            
+            return True
+
+        await db.rollback()
+        hold.stop()
+        if ticket is not None:
+            ticket.sold_out()
+        print(f"❌ Sold Out! (5/5)")
+        return False
+
     except Exception as e:
-        db.rollback()
-        print(f"🔥 Error: {e}")
+        # [ENG] Release the lock right away, then let the error through: a 404 stays a 404 and a
+        #       DB failure becomes a 500 instead of a redirect that looks like it worked.
+        # [KOR] 락은 바로 풀고 예외는 그대로 전달 (예전처럼 삼키고 리다이렉트하지 않음)
+        await db.rollback()
+        hold.stop()
+        print(f"🔥 Error: {e!r}")
+        raise
+
+async def book_viewing_cached(property_id: int) -> bool:
+    """
+    [Flow] 메모리 카운터로 즉시 판정하고, DB 저장은 백그라운드 writer에게 맡기는 예약 로직
+    Returns True when booked, False when sold out.
+    """
+    # 1. Decide (메모리에서 원자적으로 차감)
+    accepted = await slot_counter.try_acquire(property_id)
+
+    if accepted is None:
+        raise HTTPException(status_code=404, detail="House not found")
+
+    # 2. Persist later (write-behind)
+    if accepted:
+        booking_writer.submit(property_id, f"User-{random.randint(1000,9999)}")
+        print(f"✅ Booking Accepted! ({slot_counter.remaining(property_id)} left)")
+    else:
+        print(f"❌ Sold Out!")
 
-    return RedirectResponse(url="/properties", status_code=303)
\ No newline at end of file
+    return accepted
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from app.database import Base
+from shared.idempotency import idempotency_table
 from sqlalchemy.orm import relationship
 
 class Property(Base):
@@ -17,5 +18,9 @@ class Booking(Base):
     __tablename__ = "bookings"
 
     id = Column(Integer, primary_key=True, index=True)
-    property_id = Column(Integer, ForeignKey("properties.id"))
+    property_id = Column(Integer, ForeignKey("properties.id"), index=True)
     user_name = Column(String)
+
+# [KOR] 멱등성 키 테이블 (키가 기본 키 = 고유 인덱스)
+# [ENG] Idempotency keys (the key is the primary key, i.e. the unique index)
+idempotency_keys = idempotency_table(Base.metadata)
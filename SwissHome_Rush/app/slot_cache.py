@@ -0,0 +1,149 @@
+import asyncio
+
+from sqlalchemy import func, insert, select
+
+import app.models as models
+from app.database import SessionLocal
+
+
+class SlotCounter:
+    """
+    [ENG] Hot in-memory counter of remaining slots per property.
+          Handlers run on one event loop, so a check-and-decrement without an
+          `await` in between is atomic. A burst of clicks is accepted or rejected
+          without touching the database.
+    [KOR] 매물별 남은 자리를 메모리에 보관하는 카운터 (DB 조회 없이 즉시 판정)
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._load_lock = asyncio.Lock()
+        self._remaining = {}
+
+    async def rebuild(self):
+        """
+        [ENG] Reload every counter from the DB: max_slots - persisted bookings.
+        [KOR] DB 기준으로 카운터를 다시 계산합니다 (서버 시작 시 실행)
+        """
+        async with self._session_factory() as db:
+            rows = (await db.execute(
+                select(models.Property.id, models.Property.max_slots, func.count(models.Booking.id))
+                .outerjoin(models.Booking, models.Booking.property_id == models.Property.id)
+                .group_by(models.Property.id, models.Property.max_slots)
+            )).all()
+
+        self._remaining = {pid: max(max_slots - booked, 0) for pid, max_slots, booked in rows}
+        return len(rows)
+
+    async def load(self, property_id: int):
+        """
+        [ENG] Free slots of one property from the DB (None if unknown).
+              Used for properties created after startup and by the waiting room.
+        [KOR] 매물 한 곳의 남은 자리를 DB 에서 계산합니다 (대기실도 사용)
+        """
+        async with self._session_factory() as db:
+            max_slots = await db.scalar(
+                select(models.Property.max_slots).where(models.Property.id == property_id)
+            )
+            if max_slots is None:
+                return None
+            booked = await db.scalar(
+                select(func.count(models.Booking.id)).where(models.Booking.property_id == property_id)
+            )
+            return max(max_slots - booked, 0)
+
+    async def try_acquire(self, property_id: int):
+        """
+        [ENG] Atomically take one slot.
+              Returns True (accepted), False (sold out) or None (unknown property).
+        [KOR] 자리 하나를 원자적으로 차감합니다.
+        """
+        if property_id not in self._remaining:
+            async with self._load_lock:
+                if property_id not in self._remaining:
+                    remaining = await self.load(property_id)
+                    if remaining is None:
+                        return None
+                    self._remaining[property_id] = remaining
+
+        # [ENG] No await from here on: the check and the decrement cannot interleave.
+        remaining = self._remaining[property_id]
+        if remaining <= 0:
+            return False
+        self._remaining[property_id] = remaining - 1
+        return True
+
+    def remaining(self, property_id: int):
+        return self._remaining.get(property_id)
+
+
+class BookingWriter:
+    """
+    [ENG] Write-behind persistence: accepted bookings are queued in memory and a
+          background task inserts them into `bookings` in batches.
+    [KOR] 승인된 예약을 모아서 백그라운드에서 한 번에 INSERT 합니다.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 500, flush_interval: float = 0.05):
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = asyncio.Queue()
+        self._stop = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="booking-writer")
+
+    async def stop(self):
+        """
+        [ENG] Stop the writer and flush everything that is still queued.
+        """
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        while self.pending():
+            if not await self._flush(self._drain()):
+                break
+
+    def submit(self, property_id: int, user_name: str):
+        self._queue.put_nowait({"property_id": property_id, "user_name": user_name})
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                continue
+            await self._flush(self._drain(first))
+
+    async def _flush(self, batch) -> bool:
+        if not batch:
+            return True
+        try:
+            async with self._session_factory() as db:
+                await db.execute(insert(models.Booking), batch)
+                await db.commit()
+            print(f"💾 Flushed {len(batch)} bookings")
+            return True
+        except Exception as e:
+            print(f"🔥 Flush Error: {e} (retrying {len(batch)} bookings)")
+            # [ENG] The slots were already granted, so the rows must not be lost.
+            for row in batch:
+                self._queue.put_nowait(row)
+            await asyncio.sleep(self._flush_interval)
+            return False
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# [SSE 벤치마크] 유휴 구독자 N 명의 메모리 비용과 변경 하나가 모두에게 도달하는 시간
+# [SSE Benchmark] Memory cost of N idle subscribers, and how long one change takes to reach all of them.
+# Starts its own uvicorn server on a temporary database.
+#
+# Run:   python bench_events.py --subscribers 1000
+
+PORT = 8799
+
+
+def rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def subscriber(client: httpx.AsyncClient, url: str, ready: asyncio.Event, counter: list, received: list):
+    async with client.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if line.startswith(": connected"):
+                counter[0] += 1
+                if counter[0] == counter[1]:
+                    ready.set()
+            elif line.startswith("data:"):
+                received.append(time.perf_counter())
+                return
+
+
+async def run(subscribers: int, on_connected) -> float:
+    """Opens the streams, calls on_connected(), then returns the fan-out time of one write."""
+    base = f"http://127.0.0.1:{PORT}"
+    limits = httpx.Limits(max_connections=subscribers + 10)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        version = (await client.get(f"{base}/checklist")).json()["version"]
+        ready, counter, received = asyncio.Event(), [0, subscribers], []
+        url = f"{base}/checklist/events?since={version}"
+        tasks = [asyncio.create_task(subscriber(client, url, ready, counter, received)) for _ in range(subscribers)]
+        await ready.wait()
+        await asyncio.sleep(1.0)
+        on_connected()
+
+        start = time.perf_counter()
+        await client.post(f"{base}/checklist", params={"item": "Fan-out test"})
+        await asyncio.gather(*tasks)
+        return max(received) - start
+
+
+async def main_async(args, server):
+    baseline = rss_mib(server.pid)
+    connected = []
+    fan_out = await run(args.subscribers, lambda: connected.append(rss_mib(server.pid)))
+    connected = connected[0]
+
+    per_subscriber_kib = (connected - baseline) * 1024 / args.subscribers
+    print(f"Server RSS idle:              {baseline:8.1f} MiB")
+    print(f"Server RSS with {args.subscribers:>5} streams: {connected:8.1f} MiB  (~{per_subscriber_kib:.1f} KiB per subscriber)")
+    print(f"One change reached all of them in {fan_out * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE idle-subscriber memory and fan-out benchmark")
+    parser.add_argument("--subscribers", type=int, default=1000, help="Idle SSE streams to open")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="checklist-events-"), "todos.db")
+    env = {**os.environ, "CHECKLIST_DATABASE_URL": f"sqlite:///{db_path}", "CHECKLIST_SQLITE_MODE": "tuned"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning", "--no-access-log"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        for _ in range(50):  # 서버가 뜰 때까지 대기 / Wait for the server
+            try:
+                httpx.get(f"http://127.0.0.1:{PORT}/checklist", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        asyncio.run(main_async(args, server))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
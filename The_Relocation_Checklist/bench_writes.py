@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# [쓰기 벤치마크] 저장 모드별 쓰기 처리량 (동시 클라이언트 1 / 8 / 64)
+# [Write Benchmark] Write throughput per storage mode with 1, 8 and 64 concurrent clients.
+# Each client is a thread calling the POST /checklist handler directly, like FastAPI's
+# threadpool does, so the numbers show the storage path without HTTP overhead.
+# Every mode runs in its own process (the mode is read when main.py is imported).
+#
+# Run:   python bench_writes.py --seconds 5 --clients 1 8 64
+
+MODES = {
+    "default": {"CHECKLIST_SQLITE_MODE": "default", "CHECKLIST_GROUP_COMMIT_MS": "0"},
+    "tuned": {"CHECKLIST_SQLITE_MODE": "tuned", "CHECKLIST_GROUP_COMMIT_MS": "0"},
+    "tuned+group": {"CHECKLIST_SQLITE_MODE": "tuned", "CHECKLIST_GROUP_COMMIT_MS": "0.2"},
+}
+
+
+def run_clients(clients: int, seconds: float) -> dict:
+    """Runs inside the child process: `clients` threads add tasks for `seconds`."""
+    import main
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+
+    def client(number: int):
+        own, count = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                main.add_item(item=f"Client {number} task {count}")
+                own.append(time.perf_counter() - start)
+            except Exception as e:  # 예: "database is locked"
+                errors.append(type(e).__name__ + ": " + str(e).splitlines()[0])
+            count += 1
+        latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "writes": len(latencies),
+        "writes_per_s": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checklist write throughput per SQLite storage mode")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64], help="Concurrent writers per round")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each round")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        for clients in args.clients:
+            print(json.dumps(run_clients(clients, args.seconds)), flush=True)
+        return
+
+    print(f"{'mode':<13}{'clients':>8}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for mode in args.modes:
+        for clients in args.clients:
+            # 라운드마다 새 DB 파일 + 새 프로세스 / Fresh database file and process per round
+            db_path = os.path.join(tempfile.mkdtemp(prefix="checklist-bench-"), "todos.db")
+            env = {**os.environ, **MODES[mode], "CHECKLIST_DATABASE_URL": f"sqlite:///{db_path}"}
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", "--clients", str(clients), "--seconds", str(args.seconds)],
+                env=env, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<13}{r['clients']:>8}{r['writes_per_s']:>10.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>8}"
+                  + (f"  ({r['first_error'][:60]})" if r["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
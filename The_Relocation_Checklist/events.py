@@ -0,0 +1,157 @@
+import asyncio
+import json
+from collections import deque
+
+from starlette.concurrency import run_in_threadpool
+
+from shared.metrics import Gauge
+
+# ---------------------------------------------------------
+# Live Patches over Server-Sent Events / SSE 실시간 변경 알림
+# ---------------------------------------------------------
+# Every committed write transaction becomes one event:
+#
+#   id: 42
+#   event: patch
+#   data: {"version": 42, "changes": [{"id": 7, "op": "update", "fields": {"is_completed": true}}]}
+#
+# The event id is the checklist version, so a reconnecting browser resumes with Last-Event-ID.
+# Idle subscribers hold no queue: they all wait on one shared asyncio.Event and read
+# the same pre-encoded events from a ring buffer.
+
+BUFFER_EVENTS = 1024  # 메모리에 남겨 둘 최근 이벤트 수 / Recent events kept for resuming clients
+POLL_SECONDS = 1.0  # 다른 프로세스의 쓰기 확인 주기 / How often writes of other processes are picked up
+PING_SECONDS = 15.0  # 프록시가 연결을 끊지 않도록 / Keeps proxies from closing idle streams
+
+SUBSCRIBERS = Gauge("checklist_sse_subscribers", "Open Server-Sent Events streams")
+
+
+def encode(event: str, data: dict, event_id: int | None = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+class EventHub:
+    """
+    Orders the patches of committed transactions by version and fans them out.
+
+    `publish(version, changes)` may be called from any thread after a commit. Events
+    leave the hub strictly in version order. If a version never arrives (e.g. it was
+    written by another worker process), `fetch_since(version)` is used to fill the
+    gap from the database with the rows' current state.
+    """
+
+    def __init__(self, fetch_since, buffer_events: int = BUFFER_EVENTS):
+        self.fetch_since = fetch_since  # since -> (current version, {version: [changes]})
+        self.buffer = deque(maxlen=buffer_events)  # (version, encoded event)
+        self.pending: dict[int, list] = {}
+        self.last_version = 0
+        self.changed = asyncio.Event()
+        self.pings = 0
+        self.loop = None
+        self.task = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.last_version, _ = await run_in_threadpool(self.fetch_since, None)
+        self.task = asyncio.create_task(self._pump(), name="checklist-events")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.loop = None
+
+    # --- producers --------------------------------------------------
+    def publish(self, version: int, changes: list):
+        """Thread-safe; a no-op while the hub is not running (e.g. in benchmarks)."""
+        loop = self.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._accept, version, changes)
+
+    def _accept(self, version: int, changes: list):
+        if version > self.last_version:
+            self.pending[version] = changes
+            self._drain()
+
+    def _drain(self):
+        appended = False
+        while self.last_version + 1 in self.pending:
+            self.last_version += 1
+            self._append(self.last_version, self.pending.pop(self.last_version))
+            appended = True
+        if appended:
+            self._notify()
+
+    def _append(self, version: int, changes: list):
+        self.buffer.append((version, encode("patch", {"version": version, "changes": changes}, version)))
+
+    def _notify(self):
+        # 기다리던 모든 구독자를 깨우고 새 Event 로 교체 / Wake every waiting subscriber, then swap the Event
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    async def _pump(self):
+        ticks, stuck_at = 0, None
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            ticks += 1
+            current, _ = await run_in_threadpool(self.fetch_since, None)
+
+            # DB 가 앞서 있는데 한 주기 동안 진행이 없으면 DB 에서 채움
+            # The DB is ahead and nothing arrived for a whole tick: fill the gap from the DB
+            stuck = self.last_version if current > self.last_version else None
+            if stuck is not None and stuck == stuck_at:
+                await self._fill_from_db()
+                stuck = None
+            stuck_at = stuck
+
+            if ticks * POLL_SECONDS >= PING_SECONDS:
+                ticks = 0
+                self.pings += 1
+                self._notify()
+
+    async def _fill_from_db(self):
+        current, by_version = await run_in_threadpool(self.fetch_since, self.last_version)
+        for version in sorted(by_version):
+            if version > self.last_version:
+                self._append(version, by_version[version])
+        # 채운 버전의 로컬 패치는 버림 (DB 상태가 최신) / Local patches of filled versions are superseded
+        self.last_version = max(self.last_version, current)
+        self.pending = {v: c for v, c in self.pending.items() if v > self.last_version}
+        self._drain()
+        self._notify()
+
+    # --- consumers --------------------------------------------------
+    async def stream(self, since: int | None):
+        """Async generator of SSE bytes for one subscriber, starting after version `since`."""
+        last = self.last_version if since is None else since
+        oldest = self.buffer[0][0] if self.buffer else self.last_version + 1
+        if last > self.last_version or last < oldest - 1:
+            # 버퍼로 이어 줄 수 없음 -> 변경 피드로 따라잡으라고 알림
+            # Can't resume from the buffer: tell the client to catch up through /checklist/changes
+            yield encode("resync", {"since": last, "version": self.last_version})
+            return
+
+        SUBSCRIBERS.labels().inc()
+        try:
+            yield b": connected\n\n"
+            pings = self.pings
+            while True:
+                changed = self.changed  # 읽기 전에 잡아 둠 -> 그 사이 알림도 놓치지 않음 / Grab before reading: no lost wake-up
+                if self.last_version > last:
+                    if not self.buffer or self.buffer[0][0] > last + 1:
+                        # 너무 느린 구독자: 버퍼가 이미 지나감 / Too slow: the buffer already moved past this client
+                        yield encode("resync", {"since": last, "version": self.last_version})
+                        return
+                    events = [(version, event) for version, event in self.buffer if version > last]
+                    last = self.last_version if not events else events[-1][0]
+                    if events:
+                        yield b"".join(event for _, event in events)
+                    continue
+                if self.pings != pings:
+                    pings = self.pings
+                    yield b": ping\n\n"
+                await changed.wait()
+        finally:
+            SUBSCRIBERS.labels().dec()
@@ -1,16 +1,33 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Literal
+from fastapi import FastAPI, Depends, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Boolean
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import Column, Integer, String, Boolean, insert, inspect, select, text, update
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
+# Shared DB module at the repo root / 저장소 루트의 공용 DB 모듈 (shared/)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.db import make_engine
+from shared.metrics import instrument
+from events import EventHub
+from storage import GROUP_COMMIT_MS, GroupCommitWriter, run_in_transaction, tune_sqlite
+
 # ---------------------------------------------------------
 # 1. Database Setup / 데이터베이스 설정
 # ---------------------------------------------------------
-DATABASE_URL = "sqlite:///./todos.db"
+DATABASE_URL = os.getenv("CHECKLIST_DATABASE_URL", "sqlite:///./todos.db")
+
+# Create Database Engine / DB 엔진 생성 (pool settings from DB_* env vars / 풀 설정은 환경 변수로)
+engine = make_engine(DATABASE_URL, name="checklist")
 
-# Create Database Engine / DB 엔진 생성
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# WAL / synchronous / mmap / cache PRAGMAs per connection (CHECKLIST_SQLITE_MODE, SQLite only) / 연결마다 PRAGMA 설정
+tune_sqlite(engine)
 
 # Create Session / 세션 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,14 +42,44 @@ class TaskDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     task = Column(String, index=True)
     is_completed = Column(Boolean, default=False)
+    # Version of the last change (for the changes feed) / 마지막 변경 버전 (변경 피드용)
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    # Deleted rows stay as tombstones so clients can sync deletions / 삭제도 동기화되도록 행은 남겨 둠
+    deleted = Column(Boolean, nullable=False, default=False, server_default="0")
+
+# Single-row version counter: one version per write transaction / 쓰기 트랜잭션마다 1 증가하는 버전 카운터
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
 
 # Create Tables / 테이블 생성
 Base.metadata.create_all(bind=engine)
 
+# Add the sync columns to databases created before they existed / 예전 DB 에 동기화 컬럼 추가
+_task_columns = {column["name"] for column in inspect(engine).get_columns("tasks")}
+with engine.begin() as conn:
+    if "version" not in _task_columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_version ON tasks (version)"))
+    if "deleted" not in _task_columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN deleted BOOLEAN NOT NULL DEFAULT FALSE"))
+    # Seed the counter row if missing (works on any dialect) / 카운터 행이 없으면 추가
+    if conn.scalar(select(SyncState.id).where(SyncState.id == 1)) is None:
+        conn.execute(insert(SyncState).values(id=1, version=0))
+
 # ---------------------------------------------------------
 # 2. App & CORS Configuration / 앱 및 CORS 설정
 # ---------------------------------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the live event stream (SSE) / 실시간 이벤트 스트림 시작
+    await hub.start()
+    yield
+    await hub.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for all domains / 모든 도메인에 대해 CORS 허용  middleware(경비원)
 app.add_middleware(
@@ -43,6 +90,19 @@ app.add_middleware(
     allow_headers=["*"],    # Allow all headers / 모든 헤더 허용
 )
 
+# Request latency + connection pool metrics at GET /metrics / 요청 지연 시간 + 커넥션 풀 메트릭 (Prometheus)
+instrument(app)
+
+# Group commit (CHECKLIST_GROUP_COMMIT_MS > 0): one writer thread, one commit per batch of requests
+# 그룹 커밋: 몇 ms 안에 들어온 쓰기를 한 트랜잭션으로 묶어서 한 번만 커밋
+writer = GroupCommitWriter(SessionLocal) if GROUP_COMMIT_MS > 0 else None
+
+def run_write(work):
+    """Runs work(db) in a write transaction: its own, or a shared group commit."""
+    if writer is not None:
+        return writer.run(work)
+    return run_in_transaction(SessionLocal, work)
+
 # Dependency to get DB session / DB 세션을 가져오는 의존성 함수
 def get_db():   # 공구빌려줘
     db = SessionLocal()
@@ -52,44 +112,236 @@ def get_db():   # 공구빌려줘
         db.close()
 
 # ---------------------------------------------------------
-# 3. API Routes / API 라우트
+# 3. Sync Helpers / 동기화 도우미
 # ---------------------------------------------------------
+MAX_PAGE_SIZE = 500
+MAX_BULK_OPS = 1000
+# Request op -> patch op of the live stream / 요청 종류 -> 실시간 패치 종류
+PATCH_OPS = {"create": "add", "update": "update", "toggle": "update", "delete": "delete"}
+
+# One change in a bulk request / 일괄 요청 안의 변경 하나
+class TaskOp(BaseModel):
+    op: Literal["create", "update", "toggle", "delete"]
+    id: int | None = Field(None, description="Target task (not used by create)")
+    task: str | None = Field(None, description="Text for create / update")
+    is_completed: bool | None = Field(None, description="Completion state for create / update")
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.op == "create" and not self.task:
+            raise ValueError("create needs a task")
+        if self.op != "create" and self.id is None:
+            raise ValueError(f"{self.op} needs an id")
+        if self.op == "update" and self.task is None and self.is_completed is None:
+            raise ValueError("update needs a task or is_completed")
+        return self
+
+class BulkRequest(BaseModel):
+    ops: list[TaskOp] = Field(..., min_length=1, max_length=MAX_BULK_OPS)
+
+def task_dict(task: TaskDB, with_deleted: bool = False) -> dict:
+    row = {"id": task.id, "task": task.task, "is_completed": bool(task.is_completed), "version": task.version}
+    if with_deleted:
+        row["deleted"] = bool(task.deleted)
+    return row
+
+class ItemsNotFound(Exception):
+    def __init__(self, missing: list[int]):
+        super().__init__(f"Items not found: {missing}")
+        self.missing = sorted(set(missing))
+
+def current_version(db: Session) -> int:
+    return db.scalar(select(SyncState.version).where(SyncState.id == 1))
+
+def apply_ops(db: Session, ops: list[TaskOp]):
+    """
+    Applies creates / updates / toggles / deletes in the current transaction (the caller commits once).
+    Every changed row gets the same new version. Returns (version, results, patches); raises ItemsNotFound.
+    """
+    # The UPDATE takes SQLite's write lock first, so versions follow commit order
+    # UPDATE 가 먼저 쓰기 잠금을 잡으므로 버전 순서 = 커밋 순서
+    version = db.execute(
+        update(SyncState).where(SyncState.id == 1).values(version=SyncState.version + 1).returning(SyncState.version)
+    ).scalar_one()
+
+    # One SELECT for every targeted row / 대상 행을 한 번의 SELECT 로 로드
+    ids = {op.id for op in ops if op.op != "create"}
+    rows = {}
+    if ids:
+        rows = {task.id: task for task in db.scalars(select(TaskDB).where(TaskDB.id.in_(ids), TaskDB.deleted.is_(False)))}
 
-# Read (Get) / 조회
+    changed, missing = [], []
+    for op in ops:
+        if op.op == "create":
+            task = TaskDB(task=op.task, is_completed=bool(op.is_completed), version=version, deleted=False)
+            db.add(task)
+            changed.append((op.op, task, {"task": task.task, "is_completed": task.is_completed}))
+            continue
+
+        task = rows.get(op.id)
+        if task is None or task.deleted:
+            missing.append(op.id)
+            continue
+        fields = {}
+        if op.op == "update":
+            if op.task is not None:
+                task.task = fields["task"] = op.task
+            if op.is_completed is not None:
+                task.is_completed = fields["is_completed"] = op.is_completed
+        elif op.op == "toggle":
+            task.is_completed = fields["is_completed"] = not task.is_completed
+        else:
+            task.deleted = True
+        task.version = version
+        changed.append((op.op, task, fields))
+
+    if missing:
+        raise ItemsNotFound(missing)  # All or nothing: the transaction is rolled back / 전체 취소
+
+    db.flush()  # All INSERTs/UPDATEs in one flush; new ids are known after this / 한 번에 flush
+    results = [{"op": op, "item": task_dict(task, with_deleted=True)} for op, task, _ in changed]
+    # Only the changed fields, for the live stream / 실시간 스트림용: 바뀐 필드만
+    patches = [{"id": task.id, "op": PATCH_OPS[op], "fields": fields} for op, task, fields in changed]
+    return version, results, patches
+
+def write_ops(ops: list[TaskOp]):
+    """Commits the ops, then announces them to the live stream. Returns (version, results)."""
+    version, results, patches = run_write(lambda db: apply_ops(db, ops))
+    hub.publish(version, patches)
+    return version, results
+
+def fetch_since(since: int | None):
+    """
+    Current version, plus (if `since` is given) the current state of every row changed
+    after it, grouped by version. Used by the event hub to fill gaps (e.g. other processes).
+    """
+    with SessionLocal() as db:
+        version = current_version(db)
+        by_version = {}
+        if since is not None:
+            for task in db.scalars(select(TaskDB).where(TaskDB.version > since).order_by(TaskDB.version, TaskDB.id)):
+                fields = {} if task.deleted else {"task": task.task, "is_completed": bool(task.is_completed)}
+                op = "delete" if task.deleted else "update"
+                by_version.setdefault(task.version, []).append({"id": task.id, "op": op, "fields": fields})
+        return version, by_version
+
+hub = EventHub(fetch_since)
+
+# ---------------------------------------------------------
+# 4. API Routes / API 라우트
+# ---------------------------------------------------------
+
+# Read (Get) / 조회: keyset pagination + filters
 @app.get("/checklist")
-def get_checklist(db: Session = Depends(get_db)):
-    return db.query(TaskDB).all()
+def get_checklist(
+    status: Literal["all", "completed", "pending"] = Query("all", description="Filter by completion"),
+    prefix: str | None = Query(None, min_length=1, description="Only tasks starting with this text (case-sensitive)"),
+    after: int | None = Query(None, description="Return tasks with an id above this one (keyset cursor)"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    # Read the version first: changes after it may show up in the page, but none are missed by the feed
+    # 버전을 먼저 읽음 -> 이후 변경은 피드에서 다시 받으므로 빠지는 변경이 없음
+    version = current_version(db)
+
+    query = select(TaskDB).where(TaskDB.deleted.is_(False))
+    if status != "all":
+        query = query.where(TaskDB.is_completed == (status == "completed"))
+    if prefix:
+        # A range instead of LIKE, so the ix_tasks_task index is used / LIKE 대신 범위 조건 (인덱스 사용)
+        query = query.where(TaskDB.task >= prefix, TaskDB.task < prefix + "\U0010ffff")
+    if after is not None:
+        query = query.where(TaskDB.id > after)
+    rows = db.scalars(query.order_by(TaskDB.id).limit(limit + 1)).all()
+
+    items = rows[:limit]
+    return {
+        "items": [task_dict(task) for task in items],
+        "next_after": items[-1].id if len(rows) > limit else None,
+        "version": version,
+    }
+
+# Changes feed / 변경 피드: everything changed after version `since` (deletions included)
+@app.get("/checklist/changes")
+def get_changes(
+    since: int = Query(0, ge=0, description="Last version the client has seen"),
+    after_id: int | None = Query(None, ge=0, description="Continue inside version `since` after this id (only from a truncated page)"),
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    version = current_version(db)
+    newer = TaskDB.version > since
+    if after_id is not None:
+        # Continuation token: the rest of version `since` first / 잘린 페이지의 이어받기 토큰
+        newer = newer | ((TaskDB.version == since) & (TaskDB.id > after_id))
+    rows = db.scalars(
+        select(TaskDB)
+        .where(newer)
+        .order_by(TaskDB.version, TaskDB.id)
+        .limit(limit + 1)
+    ).all()
+
+    changes = rows[:limit]
+    has_more = len(rows) > limit
+    return {
+        "changes": [task_dict(task, with_deleted=True) for task in changes],
+        "has_more": has_more,
+        # Next request: ?since=<since>[&after_id=<after_id>] / 다음 요청에 그대로 사용 (after_id 는 has_more 일 때만)
+        "since": changes[-1].version if has_more else max(version, since),
+        "after_id": changes[-1].id if has_more else None,
+        "version": version,
+    }
+
+# Live patches (SSE) / 실시간 변경 스트림: resumes after Last-Event-ID (or ?since=)
+@app.get("/checklist/events")
+async def stream_events(
+    since: int | None = Query(None, ge=0, description="Version the client already has"),
+    last_event_id: str | None = Header(None, description="Sent by the browser when it reconnects"),
+):
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        hub.stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # 프록시 버퍼링 끔 / No proxy buffering
+    )
+
+# Bulk (Post) / 일괄 변경: many creates / toggles / deletes in one transaction, one commit
+@app.post("/checklist/bulk")
+def bulk_update(request: BulkRequest):
+    try:
+        version, results = write_ops(request.ops)
+    except ItemsNotFound as e:
+        raise HTTPException(status_code=404, detail={"message": "Items not found", "missing": e.missing})
+    return {"version": version, "results": results}
 
 # Create (Post) / 추가
 @app.post("/checklist")
-def add_item(item: str = Query(..., description="Task to add"), db: Session = Depends(get_db)):
-    new_task = TaskDB(task=item)
-    db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
-    return {"message": "Item added", "data": new_task}
+def add_item(item: str = Query(..., min_length=1, description="Task to add")):
+    version, results = write_ops([TaskOp(op="create", task=item)])
+    return {"message": "Item added", "data": results[0]["item"], "version": version}
 
 # Update (Put) / 수정
 @app.put("/checklist/{task_id}")
-def update_item(task_id: int, item: str = Query(..., description="New content"), db: Session = Depends(get_db)):
-    target_task = db.query(TaskDB).filter(TaskDB.id == task_id).first()
-    
-    if target_task:
-        target_task.task = item
-        db.commit()
-        db.refresh(target_task)
-        return {"message": "Item updated", "new_item": target_task}
-    
-    return {"error": "Item not found"}
+def update_item(
+    task_id: int,
+    item: str | None = Query(None, description="New content"),
+    completed: bool | None = Query(None, description="New completion state"),
+):
+    if item is None and completed is None:
+        raise HTTPException(status_code=400, detail="Give a new item and/or completed")
+    op = TaskOp(op="update", id=task_id, task=item, is_completed=completed)
+    try:
+        version, results = write_ops([op])
+    except ItemsNotFound:
+        return {"error": "Item not found"}
+    return {"message": "Item updated", "new_item": results[0]["item"], "version": version}
 
 # Delete (Delete) / 삭제
 @app.delete("/checklist/{task_id}")
-def delete_item(task_id: int, db: Session = Depends(get_db)):
-    target_task = db.query(TaskDB).filter(TaskDB.id == task_id).first()
-    
-    if target_task:
-        db.delete(target_task)
-        db.commit()
-        return {"message": "Item deleted"}
-    
-    return {"error": "Item not found"}
\ No newline at end of file
+def delete_item(task_id: int):
+    try:
+        version, _ = write_ops([TaskOp(op="delete", id=task_id)])
+    except ItemsNotFound:
+        return {"error": "Item not found"}
+    return {"message": "Item deleted", "version": version}
@@ -1,117 +1,437 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Header, HTTPException, Query
+from sqlalchemy import delete, func, insert, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import os
 import time
+import weakref
 import models
 from database import engine, SessionLocal
+from shared.idempotency import IdempotencyStore, Outcome
+from shared.metrics import instrument, timer
+from shared.waiting_room import Rejected, WaitingRoom
 
-# [KOR] 서버 시작 시 테이블 자동 생성
-# [ENG] Automatically create tables on server startup
-models.Base.metadata.create_all(bind=engine)
+# -------------------------------------------------------------------
+# [KOR] 예약 엔진 선택 (배포 환경 변수로 지정)
+#       lock   : 비관적 락 (SELECT ... FOR UPDATE) - 기존 방식
+#       atomic : 조건부 UPDATE 한 문장으로 슬롯 차감 (락 대기 없음)
+# [ENG] Reservation engine selection (set per deployment via env var)
+#       lock   : Pessimistic locking (SELECT ... FOR UPDATE) - original
+#       atomic : Single guarded UPDATE claims the slot (no lock held across app code)
+# -------------------------------------------------------------------
+RESERVATION_ENGINES = ("lock", "atomic")
+RESERVATION_ENGINE = os.getenv("RESERVATION_ENGINE", "lock")
 
-app = FastAPI()
+if RESERVATION_ENGINE not in RESERVATION_ENGINES:
+    raise RuntimeError(
+        f"Unknown RESERVATION_ENGINE '{RESERVATION_ENGINE}'. Choose one of {RESERVATION_ENGINES}."
+    )
 
 # -------------------------------------------------------------------
-# [KOR] DB 세션 의존성 주입
-# [ENG] Database Session Dependency Injection
+# [KOR] 대기실: on 이면 남은 자리 + 여유분 (WAITING_ROOM_MARGIN) 만큼만 예약 엔진으로 보내고
+#       나머지 클릭은 DB 를 거치지 않고 대기 순번과 함께 즉시 거절합니다.
+# [ENG] Waiting room: when on, only remaining slots + WAITING_ROOM_MARGIN clicks reach the
+#       engine; the rest are rejected from memory with their queue position.
 # -------------------------------------------------------------------
-def get_db():
-    db = SessionLocal()
-    try:
+WAITING_ROOM = os.getenv("WAITING_ROOM", "off")
+
+if WAITING_ROOM not in ("on", "off"):
+    raise RuntimeError(f"Unknown WAITING_ROOM '{WAITING_ROOM}'. Choose 'on' or 'off'.")
+
+
+async def load_remaining(property_id: int):
+    """
+    [KOR] 대기실이 사용할 남은 자리 수 (정원 - 저장된 예약 수)
+    [ENG] Free slots for the waiting room: max_slots - persisted bookings (None if unknown)
+    """
+    async with SessionLocal() as db:
+        max_slots = await db.scalar(select(models.Property.max_slots).where(models.Property.id == property_id))
+        if max_slots is None:
+            return None
+        booked = await db.scalar(
+            select(func.count(models.Booking.id)).where(models.Booking.property_id == property_id)
+        )
+        return max_slots - booked
+
+
+waiting_room = WaitingRoom("viewing", load_remaining) if WAITING_ROOM == "on" else None
+
+# -------------------------------------------------------------------
+# [KOR] 멱등성 키: Idempotency-Key 헤더가 같은 재시도는 처음 결과를 그대로 받습니다 (락 없이).
+#       예약과 키는 같은 트랜잭션에 커밋되므로 재시도가 자리를 두 번 차지할 수 없습니다.
+# [ENG] Idempotency keys: a retry with the same Idempotency-Key header gets the original
+#       outcome without touching the lock. The key is committed in the booking's own
+#       transaction, so a retry can never take a second slot.
+# -------------------------------------------------------------------
+idempotency = IdempotencyStore("viewing", models.idempotency_keys, SessionLocal)
+
+# -------------------------------------------------------------------
+# [KOR] 매물별 락 샤딩 (lock 엔진): 같은 매물을 노리는 요청은 프로세스 안에서 먼저 줄을 서고,
+#       매물마다 한 요청만 DB 커넥션을 잡은 채 행 락을 기다립니다.
+#       인기 매물 하나에 몰린 클릭이 커넥션 풀을 모두 차지해 다른 매물까지 막는 일이 없습니다.
+# [ENG] Per-property lock sharding (lock engine): requests for the same property queue
+#       in the process first, so per property only one of them holds a pooled connection
+#       while it waits for the row lock. A burst on one hot listing can no longer take
+#       every connection and stall the other listings. Unused locks are dropped (weak refs).
+# -------------------------------------------------------------------
+_property_locks = weakref.WeakValueDictionary()
+
+
+def property_lock(property_id: int) -> asyncio.Lock:
+    lock = _property_locks.get(property_id)
+    if lock is None:
+        lock = _property_locks[property_id] = asyncio.Lock()
+    return lock
+
+# -------------------------------------------------------------------
+# [KOR] 서버 시작 시 테이블 자동 생성 (비동기 엔진은 run_sync 사용)
+# [ENG] Automatically create tables on server startup (run_sync on the async engine)
+# -------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        # [KOR] 예전 버전이 만든 테이블에도 매물별 COUNT 용 인덱스 추가
+        # [ENG] Tables created by an older version get the per-property COUNT index too
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bookings_property_id ON bookings (property_id)"))
+        # [KOR] 예전 버전이 만든 properties 테이블에 남은 자리 컬럼 추가 후, 저장된 예약 수로 채움
+        # [ENG] A properties table created by an older version gets the remaining-slot counter,
+        #       backfilled from the persisted bookings (not 0, which would look sold out)
+        await conn.execute(text("ALTER TABLE properties ADD COLUMN IF NOT EXISTS remaining_slots INTEGER"))
+        await conn.execute(text(
+            "UPDATE properties SET remaining_slots = GREATEST(max_slots - "
+            "(SELECT count(*) FROM bookings WHERE bookings.property_id = properties.id), 0) "
+            "WHERE remaining_slots IS NULL"
+        ))
+    yield
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# -------------------------------------------------------------------
+# [KOR] 메트릭: 경로별 지연 시간, 처리 중 요청 수, 락 대기/보유 시간, 커넥션 풀 -> GET /metrics
+# [ENG] Metrics: per-route latency, in-flight requests, lock wait/hold timers and
+#       connection pool stats, served at GET /metrics (Prometheus text format)
+# -------------------------------------------------------------------
+instrument(app)
+
+# -------------------------------------------------------------------
+# [KOR] DB 세션 의존성 주입 (AsyncSession)
+#       스레드풀 대신 이벤트 루프에서 실행되므로 동시 처리량은 DB 커넥션 수로만 제한됩니다.
+# [ENG] Database Session Dependency Injection (AsyncSession)
+#       Handlers run on the event loop instead of the threadpool,
+#       so concurrency is bounded by DB connections, not threads.
+# -------------------------------------------------------------------
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # ===================================================================
 # 1. Reserve Slot (Concurrency Control Logic)
 # ===================================================================
 @app.post("/booking/reserve")
-def reserve_slot(db: Session = Depends(get_db)):
+async def reserve_slot(
+    property_id: int = Query(1, ge=1),
+    idempotency_key: str | None = Header(None, max_length=255, description="Retries with the same key get the first outcome"),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    [KOR] 동기식 처리와 비관적 락을 사용한 예약 처리
-    [ENG] Reservation processing using Synchronous execution and Pessimistic Locking
+    [KOR] 설정된 예약 엔진(lock / atomic)으로 매물 하나(property_id, 기본 1)를 예약합니다.
+    [ENG] Reserves a slot of one property (property_id, default 1) with the configured engine (lock / atomic).
     """
-    
+    if idempotency_key is None:
+        return await admit_and_reserve(db, property_id)
+
+    request = f"POST /booking/reserve?property_id={property_id}"
+
+    async def run(key: str) -> Outcome:
+        async def on_booked(db: AsyncSession, body: dict):
+            await idempotency.stage(db, key, request, Outcome(200, body))
+
+        try:
+            return Outcome(200, await admit_and_reserve(db, property_id, on_booked))
+        except HTTPException as e:
+            if e.status_code != 400:
+                raise  # [KOR] 404 / 429 는 최종 결과가 아님 [ENG] 404 and 429 are not final
+            outcome = Outcome(400, {"detail": e.detail})
+            await idempotency.save(key, request, outcome)
+            return outcome
+
+    outcome, replayed = await idempotency.handle(idempotency_key, request, run)
+    return outcome.response(replayed)
+
+
+async def admit_and_reserve(db: AsyncSession, property_id: int, on_booked=None):
+    """
+    [KOR] (대기실을 거쳐) 예약 엔진을 실행합니다. on_booked(db, body) 는 커밋 직전에 호출됩니다.
+    [ENG] Runs the engine (behind the waiting room, if on). on_booked(db, body) runs right before the commit.
+    """
+    reserve = reserve_slot_atomic if RESERVATION_ENGINE == "atomic" else reserve_slot_locked
+    if waiting_room is None:
+        return await reserve(db, property_id, on_booked)
+
+    try:
+        async with waiting_room.admit(property_id) as ticket:
+            try:
+                result = await reserve(db, property_id, on_booked)
+            except HTTPException as e:
+                if e.status_code == 400:
+                    ticket.sold_out()
+                raise
+            ticket.booked()
+            return result
+    except Rejected as rejected:
+        # [KOR] 매진이면 400, 앞사람들이 남은 자리를 처리 중이면 429 (잠시 후 재시도 가능)
+        # [ENG] 400 when sold out; 429 while the people ahead are still claiming the last slots
+        if rejected.sold_out:
+            raise HTTPException(status_code=400, detail={"message": "Sold Out! Too late.", **rejected.ticket.detail()})
+        raise HTTPException(
+            status_code=429,
+            detail={"message": "Waiting room full. The remaining slots are being claimed.", **rejected.ticket.detail()},
+            headers={"Retry-After": "1"},
+        )
+
+
+async def reserve_slot_locked(db: AsyncSession, property_id: int, on_booked=None):
+    """
+    [KOR] 비관적 락을 사용한 예약 처리 (매물별 락 샤드 안에서 실행)
+    [ENG] Reservation processing using Pessimistic Locking (inside the property's lock shard)
+    """
+    # [KOR] 세션은 첫 쿼리 때 커넥션을 가져오므로, 여기서 기다리는 동안은 커넥션을 잡지 않습니다.
+    # [ENG] The session checks out a connection on its first query, so no connection is held while queued here.
+    lock = property_lock(property_id)  # [KOR] 참조를 쥐고 있어야 락이 유지됨 [ENG] Keep a reference: the map is weak
+    with timer("reserve_queue_wait"):
+        await lock.acquire()
+    try:
+        return await _reserve_slot_locked(db, property_id, on_booked)
+    finally:
+        lock.release()
+
+
+async def _reserve_slot_locked(db: AsyncSession, property_id: int, on_booked):
     # ---------------------------------------------------------------
     # [Step 1] Acquire Lock (방어 시작)
     # ---------------------------------------------------------------
-    # [KOR] 'with_for_update()'를 사용하여 해당 행(Row)을 잠급니다.
-    #       트랜잭션이 끝날 때까지 다른 요청은 대기(Wait)합니다.
-    # [ENG] Locks the row using 'with_for_update()'.
-    #       Other requests must wait until this transaction is finished.
-    prop = db.query(models.Property)\
-             .filter(models.Property.id == 1)\
-             .with_for_update()\
-             .first()
+    # [KOR] 'with_for_update()'를 사용하여 해당 매물의 행(Row)만 잠급니다.
+    #       트랜잭션이 끝날 때까지 같은 매물의 다른 요청은 대기(Wait)합니다. 다른 매물은 영향 없음.
+    # [ENG] Locks this property's row using 'with_for_update()'.
+    #       Other requests for the same property wait until this transaction is finished;
+    #       other properties are not affected.
+    with timer("reserve_lock_wait"):
+        prop = await db.scalar(
+            select(models.Property)
+            .where(models.Property.id == property_id)
+            .with_for_update()
+        )
     
     if not prop:
         raise HTTPException(status_code=404, detail="Property not found")
 
+    # [KOR] 락 보유 시간: 여기서부터 커밋(또는 롤백)까지
+    # [ENG] Lock hold time: from here until commit (or rollback)
+    hold = timer("reserve_lock_hold").start()
+    try:
+        # ---------------------------------------------------------------
+        # [Step 2] Check Current State (검증)
+        # ---------------------------------------------------------------
+        # [KOR] 락이 걸린 상태에서 이 매물의 예약 수만 조회합니다 (property_id 인덱스 사용).
+        # [ENG] Safely count this property's bookings under the lock (uses the property_id index).
+        current_count = await db.scalar(
+            select(func.count(models.Booking.id)).where(models.Booking.property_id == property_id)
+        )
+
+        # ---------------------------------------------------------------
+        # [Step 3] Business Logic & Delay Simulation (실행)
+        # ---------------------------------------------------------------
+        if current_count < prop.max_slots:
+            # [KOR] 처리 지연 시뮬레이션 (락이 유지되는 동안, 이벤트 루프는 막지 않음)
+            # [ENG] Simulation of processing delay (While lock is held, without blocking the event loop)
+            await asyncio.sleep(0.1)
+
+            # [KOR] 예약 생성 (메모리)
+            # [ENG] Create Booking Object (In Memory)
+            new_booking = models.Booking(
+                property_id=prop.id,
+                user_name=f"User-{int(time.time()*1000)}"
+            )
+
+            db.add(new_booking)
+            # [KOR] atomic 엔진과 같은 카운터도 차감 (두 엔진이 같은 DB 를 함께 써도 초과 예약 없음)
+            # [ENG] Decrement the atomic engine's counter too, so both engines can share one DB
+            await db.execute(
+                update(models.Property)
+                .where(models.Property.id == property_id)
+                .values(remaining_slots=models.Property.remaining_slots - 1)
+            )
+            await db.flush()  # [KOR] booking_id 확보 [ENG] Assigns booking_id
+            body = {"status": "Success", "booking_id": new_booking.id}
+            if on_booked is not None:
+                await on_booked(db, body)  # [KOR] 같은 트랜잭션 (예: 멱등성 키) [ENG] Same transaction (e.g. idempotency key)
+
+            # [Step 4] Commit (확정 및 락 해제)
+            await db.commit() # [KOR] 커밋 시점에 락이 해제됩니다. [ENG] Lock is released upon commit.
+
+            return body
+
+        else:
+            # [KOR] 정원 초과 시 실패 처리
+            # [ENG] Reject if capacity is full
+            await db.rollback()  # [KOR] 즉시 락 해제 [ENG] Release the lock right away
+            raise HTTPException(status_code=400, detail="Sold Out! Too late.")
+    finally:
+        hold.stop()
+
+
+async def reserve_slot_atomic(db: AsyncSession, property_id: int, on_booked=None):
+    """
+    [KOR] 조건부 UPDATE + INSERT 한 문장으로 슬롯을 확보하는 예약 처리
+    [ENG] Reservation processing that claims a slot with one guarded UPDATE + INSERT statement
+    """
+
     # ---------------------------------------------------------------
-    # [Step 2] Check Current State (검증)
+    # [Step 1] Delay Simulation (락 없이 실행)
     # ---------------------------------------------------------------
-    # [KOR] 락이 걸린 상태에서 안전하게 현재 예약 수를 조회합니다.
-    # [ENG] Safely query the current booking count under the lock.
-    current_count = db.query(models.Booking).count()
-    
+    # [KOR] 처리 지연은 슬롯 확보 전에 실행되므로 어떤 락도, 커넥션도 잡고 있지 않습니다.
+    # [ENG] The processing delay runs before the claim, so no lock (or connection) is held during it.
+    await asyncio.sleep(0.1)
+
     # ---------------------------------------------------------------
-    # [Step 3] Business Logic & Delay Simulation (실행)
+    # [Step 2] Claim a Slot (원자적 차감)
     # ---------------------------------------------------------------
-    if current_count < prop.max_slots:
-        # [KOR] 처리 지연 시뮬레이션 (락이 유지되는 동안)
-        # [ENG] Simulation of processing delay (While lock is held)
-        time.sleep(0.1) 
-        
-        # [KOR] 예약 생성 (메모리)
-        # [ENG] Create Booking Object (In Memory)
-        new_booking = models.Booking(
-            property_id=prop.id,
-            user_name=f"User-{int(time.time()*1000)}"
+    # [KOR] remaining_slots > 0 일 때만 1 감소시키고, 같은 문장에서 예약을 INSERT 합니다.
+    #       PostgreSQL이 행 단위로 UPDATE를 직렬화하므로 초과 예약이 불가능합니다.
+    # [ENG] Decrement remaining_slots only while it is > 0 and INSERT the booking in the
+    #       same statement. PostgreSQL serializes the row update, so overbooking is impossible.
+    #
+    #   WITH claimed AS (
+    #       UPDATE properties SET remaining_slots = remaining_slots - 1
+    #       WHERE id = :property_id AND remaining_slots > 0 RETURNING id
+    #   )
+    #   INSERT INTO bookings (property_id, user_name)
+    #   SELECT id, :user_name FROM claimed RETURNING id
+    claim = timer("reserve_atomic_claim").start()
+    # [KOR] 실패(예외)해도 타이머는 항상 멈춤 [ENG] The timer stops on errors too, like the lock path
+    try:
+        claimed = (
+            update(models.Property)
+            .where(models.Property.id == property_id, models.Property.remaining_slots > 0)
+            .values(remaining_slots=models.Property.remaining_slots - 1)
+            .returning(models.Property.id)
+            .cte("claimed")
         )
-        
-        # [Step 4] Commit (확정 및 락 해제)
-        db.add(new_booking)
-        db.commit() # [KOR] 커밋 시점에 락이 해제됩니다. [ENG] Lock is released upon commit.
-        db.refresh(new_booking)
-        
-        return {"status": "Success", "booking_id": new_booking.id}
-    
-    else:
-        # [KOR] 정원 초과 시 실패 처리
-        # [ENG] Reject if capacity is full
-        raise HTTPException(status_code=400, detail="Sold Out! Too late.")
+        stmt = (
+            insert(models.Booking)
+            .from_select(
+                ["property_id", "user_name"],
+                select(claimed.c.id, literal(f"User-{int(time.time()*1000)}")),
+            )
+            .returning(models.Booking.id)
+        )
+        booking_id = await db.scalar(stmt)
+        body = {"status": "Success", "booking_id": booking_id}
+        if booking_id is not None and on_booked is not None:
+            await on_booked(db, body)  # [KOR] 같은 트랜잭션 (예: 멱등성 키) [ENG] Same transaction (e.g. idempotency key)
+
+        # [Step 3] Commit (행 락은 커밋까지만 유지됩니다)
+        # [ENG] Commit immediately (the row lock only lives until this commit)
+        await db.commit()
+    finally:
+        claim.stop()
+
+    if booking_id is not None:
+        return body
+
+    # ---------------------------------------------------------------
+    # [Step 4] Reject (실패 원인 구분)
+    # ---------------------------------------------------------------
+    if await db.scalar(select(models.Property.id).where(models.Property.id == property_id)) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    raise HTTPException(status_code=400, detail="Sold Out! Too late.")
 
 # ===================================================================
 # 2. Reset System (For Testing)
 # ===================================================================
 @app.get("/booking/reset")
-def reset_system(db: Session = Depends(get_db)):
+async def reset_system(
+    properties: int = Query(1, ge=1, le=100_000),
+    max_slots: int = Query(5, ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    [KOR] 예약을 모두 지우고 매물 1..properties 를 정원 max_slots 로 초기화합니다 (기본: 매물 1개, 5명)
+    [ENG] Deletes every booking and resets properties 1..properties to max_slots each (default: 1 property, 5 slots)
+    """
     # [KOR] 기존 데이터 삭제
     # [ENG] Delete existing data
-    db.query(models.Booking).delete()
-    
-    # [KOR] 매물 상태 초기화 (정원 5명)
-    # [ENG] Reset property status (Capacity: 5)
-    prop = db.query(models.Property).filter(models.Property.id == 1).first()
-    if not prop:
-        prop = models.Property(id=1, name="Zurich Penthouse", max_slots=5)
-        db.add(prop)
-    else:
-        prop.max_slots = 5
-    
-    db.commit()
-    return {"message": "System Reset Complete. Max Slots: 5"}
+    await db.execute(delete(models.Booking))
+    await db.execute(delete(models.Property).where(models.Property.id > properties))
+    await idempotency.clear(db)  # [KOR] 지운 예약을 재생하지 않도록 [ENG] Don't replay deleted bookings
+
+    # [KOR] 매물 상태 초기화 (없으면 생성) - UPSERT, 파라미터 한도 때문에 5,000 개씩
+    # [ENG] Reset property status (created if missing) with UPSERTs of 5,000 rows (bind parameter limit)
+    for first in range(1, properties + 1, 5000):
+        stmt = pg_insert(models.Property).values([
+            {"id": i, "name": "Zurich Penthouse" if i == 1 else f"Listing #{i}",
+             "max_slots": max_slots, "remaining_slots": max_slots}
+            for i in range(first, min(first + 5000, properties + 1))
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.Property.id],
+            set_={"max_slots": stmt.excluded.max_slots, "remaining_slots": stmt.excluded.remaining_slots},
+        ))
+
+    await db.commit()
+    if waiting_room is not None:
+        waiting_room.reset()  # [KOR] 다음 클릭이 DB 에서 다시 읽음 [ENG] The next click reloads from the DB
+    return {"message": f"System Reset Complete. Max Slots: {max_slots}", "properties": properties}
 
 # ===================================================================
 # 3. Status Dashboard (Monitoring)
 # ===================================================================
 @app.get("/booking/status")
-def check_status(db: Session = Depends(get_db)):
-    prop = db.query(models.Property).filter(models.Property.id == 1).first()
-    bookings = db.query(models.Booking).all()
+async def check_status(property_id: int = Query(1, ge=1), db: AsyncSession = Depends(get_db)):
+    prop = await db.get(models.Property, property_id)
+    if not prop:
+        raise HTTPException(status_code=404, detail="Property not found")
+    bookings = (await db.scalars(
+        select(models.Booking).where(models.Booking.property_id == property_id)
+    )).all()
     
     return {
+        "engine": RESERVATION_ENGINE,
+        "property_id": property_id,
         "max_slots": prop.max_slots,
         "current_bookings": len(bookings),
         "is_overbooked": len(bookings) > prop.max_slots,
         "survivors": [b.user_name for b in bookings]
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/booking/summary")
+async def check_summary(db: AsyncSession = Depends(get_db)):
+    """
+    [KOR] 모든 매물의 예약 수를 한 번의 집계 쿼리로 (부하 테스트 검증용)
+    [ENG] Booking counts of every property in one aggregated query (used by the load-test checks)
+    """
+    booked = (
+        select(models.Booking.property_id, func.count(models.Booking.id).label("booked"))
+        .group_by(models.Booking.property_id)
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(models.Property.id, models.Property.max_slots, func.coalesce(booked.c.booked, 0))
+        .outerjoin(booked, booked.c.property_id == models.Property.id)
+        .order_by(models.Property.id)
+    )).all()
+
+    return {
+        "engine": RESERVATION_ENGINE,
+        "properties": len(rows),
+        "total_slots": sum(max_slots for _, max_slots, _ in rows),
+        "total_bookings": sum(count for _, _, count in rows),
+        "overbooked": [pid for pid, max_slots, count in rows if count > max_slots],
+        "bookings": {pid: count for pid, _, count in rows},
+        "max_slots": {pid: max_slots for pid, max_slots, _ in rows},
+    }
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
 from database import Base
+from shared.idempotency import idempotency_table
 
 class Property(Base):
     # [KOR] 매물 정보 테이블
@@ -13,14 +14,24 @@ class Property(Base):
     # [ENG] Maximum capacity (Crucial to strictly enforce this limit)
     max_slots = Column(Integer)
 
+    # [KOR] 남은 예약 가능 인원 (atomic 엔진이 조건부 UPDATE로 차감)
+    # [ENG] Remaining capacity (decremented by the atomic engine via a guarded UPDATE)
+    remaining_slots = Column(Integer, default=0)
+
 class Booking(Base):
     # [KOR] 예약 기록 테이블
     # [ENG] Booking History Table
     __tablename__ = "bookings"
 
     id = Column(Integer, primary_key=True, index=True)
-    property_id = Column(Integer, ForeignKey("properties.id"))
+    # [KOR] 매물별 COUNT 가 테이블 전체를 훑지 않도록 인덱스
+    # [ENG] Indexed, so the per-property COUNT does not scan the whole table
+    property_id = Column(Integer, ForeignKey("properties.id"), index=True)
     
     # [KOR] 예약자 이름 (식별자)
     # [ENG] Booker's Name (Identifier)
-    user_name = Column(String)
\ No newline at end of file
+    user_name = Column(String)
+
+# [KOR] 멱등성 키 테이블 (키가 기본 키 = 고유 인덱스, 예약과 같은 트랜잭션에 기록)
+# [ENG] Idempotency keys (the key is the primary key, written in the booking's transaction)
+idempotency_keys = idempotency_table(Base.metadata)
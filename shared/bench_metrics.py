@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+# [계측 오버헤드 벤치마크] 미들웨어/타이머가 요청마다 더하는 시간 측정
+# [Instrumentation Overhead Benchmark] Time the middleware and timers add per request.
+# The ASGI app is called directly (no sockets), so the difference is the instrumentation alone.
+#
+# Run:   python shared/bench_metrics.py --requests 50000
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.metrics import REGISTRY, instrument, timer
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", response_class=PlainTextResponse)
+    async def read_item(item_id: int):
+        return "ok"
+
+    return instrument(app) if instrumented else app
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def per_request_us(app, requests: int) -> float:
+    for i in range(1000):  # warm-up (route compilation, label series creation)
+        await call(app, f"/items/{i}")
+    start = perf_counter()
+    for i in range(requests):
+        await call(app, f"/items/{i}")
+    return (perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics middleware overhead")
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5, help="Best of N rounds per variant")
+    args = parser.parse_args()
+
+    plain, instrumented = make_app(False), make_app(True)
+    results = {"plain": [], "instrumented": []}
+    for _ in range(args.rounds):
+        results["plain"].append(asyncio.run(per_request_us(plain, args.requests)))
+        results["instrumented"].append(asyncio.run(per_request_us(instrumented, args.requests)))
+
+    best_plain, best_instrumented = min(results["plain"]), min(results["instrumented"])
+    print(f"{'variant':<14} | {'µs/request':>10}")
+    print(f"{'plain':<14} | {best_plain:>10.2f}")
+    print(f"{'instrumented':<14} | {best_instrumented:>10.2f}")
+    print(f"middleware overhead: {best_instrumented - best_plain:.2f} µs/request")
+
+    rounds = args.requests
+    start = perf_counter()
+    for _ in range(rounds):
+        with timer("bench_section"):
+            pass
+    print(f"timer() overhead:    {(perf_counter() - start) / rounds * 1e6:.2f} µs/section")
+
+    start = perf_counter()
+    REGISTRY.render()
+    print(f"render /metrics:     {(perf_counter() - start) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+
+# [부하 테스트] 캐시된 첫 화면 (shared/page_cache.py) 과 앱의 JSON API 의 초당 요청 수 / p50 / p99
+# [Load Test] Requests/sec, p50 and p99 for a cached initial page (shared/page_cache.py)
+# and an app's JSON API. Each app's bench_pages.py passes its own API scenario:
+#
+#   main("Commute Score", {"GET /stations/suggest": {"method": "GET", "url": "/stations/suggest", "params": {"q": "zur"}}})
+
+
+async def worker(client, request, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.send(request())
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run_scenario(client, name, request, concurrency, duration):
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(worker(client, request, start + duration, latencies, statuses) for _ in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    codes = ", ".join(f"{code}x{count}" for code, count in sorted(statuses.items()))
+    print(f"{name:<22} {len(latencies) / elapsed:>9.0f} {p50:>9.1f} {p99:>9.1f}   {codes}")
+
+
+async def run(base_url, concurrency, duration, api: dict):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        first = await client.get("/", headers={"Accept-Encoding": "gzip, br"})
+        etag = first.headers.get("etag", '"none"')
+
+        scenarios = {
+            "GET / (gzip/br)": lambda: client.build_request("GET", "/", headers={"Accept-Encoding": "gzip, br"}),
+            "GET / (If-None-Match)": lambda: client.build_request(
+                "GET", "/", headers={"Accept-Encoding": "gzip, br", "If-None-Match": etag}
+            ),
+        }
+        # 앱별 API 요청 (build_request 인자) / App-specific API requests (build_request kwargs)
+        for name, kwargs in api.items():
+            scenarios[name] = lambda kwargs=kwargs: client.build_request(**kwargs)
+
+        print(f"{'Scenario':<22} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}   status")
+        for name, request in scenarios.items():
+            await run_scenario(client, name, request, concurrency, duration)
+
+
+def main(title: str, api: dict, argv=None):
+    parser = argparse.ArgumentParser(description=f"{title} page/API load test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Seconds per scenario")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.url, args.concurrency, args.duration, api))
@@ -0,0 +1,137 @@
+import os
+from dataclasses import dataclass, replace
+from time import perf_counter
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from shared.metrics import REGISTRY, Counter, Histogram, header
+
+# [공용 DB 모듈] 모든 DB 앱이 같은 방식으로 엔진/커넥션 풀을 만들고 계측
+# [Shared DB Module] Every DB-backed app builds its engine through here:
+#   - pool size / overflow / timeout / pre-ping / recycle / statement timeout from env vars
+#   - instrumented pool: checked-out, overflow and checkout wait time, served at /metrics (shared/metrics.py)
+#
+#   DB_POOL_SIZE=20 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=5 DB_STATEMENT_TIMEOUT_MS=2000 uvicorn main:app
+
+# 커넥션을 기다린 시간 (대부분 0 에 가까움) / Checkout wait: mostly ~0, the tail is what matters
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a connection from the pool", ["pool"], WAIT_BUCKETS)
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up after pool_timeout", ["pool"])
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 10.0  # 풀이 가득 찼을 때 최대 대기 (초) / Max wait for a free connection
+    pool_pre_ping: bool = True  # 끊어진 연결을 쓰기 전에 감지 / Detect dead connections on checkout
+    pool_recycle: int = 1800  # 이보다 오래된 연결은 새로 맺음 (초) / Reconnect after N seconds
+    statement_timeout_ms: int = 0  # 0 = 제한 없음 / 0 = no limit (PostgreSQL only)
+
+    @classmethod
+    def from_env(cls, defaults: "PoolSettings | None" = None) -> "PoolSettings":
+        """App defaults, overridden by DB_* environment variables."""
+        defaults = defaults or cls()
+        return replace(
+            defaults,
+            pool_size=int(os.getenv("DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.pool_timeout)),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", defaults.pool_pre_ping),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", defaults.pool_recycle)),
+            statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", defaults.statement_timeout_ms)),
+        )
+
+
+class PoolStats:
+    """Metric series of one engine's pool (shared by the pool and its re-creations)."""
+
+    def __init__(self, name: str, settings: PoolSettings):
+        self.name = name
+        self.settings = settings
+        self.wait = POOL_WAIT.labels(name)
+        self.timeouts = POOL_TIMEOUTS.labels(name)
+        self.engine = None  # sync Engine (engine.sync_engine for async engines)
+
+
+# 이름 -> 통계 (프로세스 안의 모든 엔진) / name -> stats of every engine in this process
+POOLS: dict[str, PoolStats] = {}
+
+
+def _instrumented_pool(base: type, stats: PoolStats) -> type:
+    # 엔진마다 하위 클래스 하나 -> dispose() 로 풀을 다시 만들어도 같은 통계를 이어서 씀
+    # One subclass per engine: pools re-created by dispose() keep reporting into the same stats
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return base._do_get(self)
+        except exc.TimeoutError:
+            stats.timeouts.inc()
+            raise
+        finally:
+            stats.wait.observe(perf_counter() - start)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def _connect_args(url: str, settings: PoolSettings) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite 는 여러 스레드에서 같은 연결을 쓰려면 이 옵션이 필요
+        return {"check_same_thread": False}
+    if not settings.statement_timeout_ms or not url.startswith("postgresql"):
+        return {}
+    if "+asyncpg" in url:
+        return {"server_settings": {"statement_timeout": str(settings.statement_timeout_ms)}}
+    return {"options": f"-c statement_timeout={settings.statement_timeout_ms}"}
+
+
+def make_engine(url: str, name: str, defaults: PoolSettings | None = None, is_async: bool = False, **kwargs):
+    """
+    Creates a (sync or async) engine with env-configured, instrumented pooling.
+    `defaults` are the app's own pool settings; DB_* variables override them.
+    """
+    settings = PoolSettings.from_env(defaults)
+    stats = PoolStats(name, settings)
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+
+    engine = (create_async_engine if is_async else create_engine)(
+        url,
+        poolclass=_instrumented_pool(base, stats),
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_recycle=settings.pool_recycle,
+        connect_args={**_connect_args(url, settings), **kwargs.pop("connect_args", {})},
+        **kwargs,
+    )
+    stats.engine = engine.sync_engine if is_async else engine
+    POOLS[name] = stats
+    return engine
+
+
+def collect_pool_gauges() -> list[str]:
+    gauges = {
+        "db_pool_size": ("Configured number of persistent connections", lambda s, p: p.size()),
+        "db_pool_max_overflow": ("Configured extra connections above the pool size", lambda s, p: s.settings.max_overflow),
+        "db_pool_checked_out": ("Connections currently in use", lambda s, p: p.checkedout()),
+        "db_pool_checked_in": ("Idle connections in the pool", lambda s, p: p.checkedin()),
+        "db_pool_overflow": ("Overflow connections currently open", lambda s, p: max(0, p.overflow())),
+    }
+    lines = []
+    for metric, (help_text, read) in gauges.items():
+        lines += header(metric, "gauge", help_text)
+        lines += [f'{metric}{{pool="{s.name}"}} {read(s, s.engine.pool)}' for s in POOLS.values()]
+    return lines
+
+
+# 풀 상태는 /metrics 를 읽을 때 계산 / Pool gauges are read when /metrics is scraped
+REGISTRY.add_collector(collect_pool_gauges)
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Table, delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+
+from shared.metrics import Counter
+
+# [멱등성 키] 같은 Idempotency-Key 로 다시 온 요청에는 처음 결과를 그대로 돌려줌 (슬롯 락 없이)
+# [Idempotency Keys] A retry with the same Idempotency-Key gets the original outcome back,
+# without touching the slot lock again.
+#
+#   store = IdempotencyStore("viewing", idempotency_table(Base.metadata), SessionLocal)
+#   outcome, replayed = await store.handle(key, f"POST /booking/reserve?property_id={pid}", run)
+#
+# run(key) performs the request once and returns an Outcome. A booking must stage its key
+# with `await store.stage(db, key, request, outcome)` in the SAME transaction that inserts
+# the booking: the primary key on `key` then guarantees that only one of two racing
+# duplicates (e.g. in two workers) can commit, and the loser replays the winner's outcome.
+# Definitive refusals (sold out) are saved afterwards with `store.save(...)`; transient
+# ones (429, 404, 500) are not stored, so the retry runs again.
+#
+# A key missing from the in-process cache costs one SELECT before run() (another worker
+# may have stored it). Stores whose outcomes only live in memory (e.g. SwissHome cache
+# mode) pass persistent=False and never touch the table.
+
+TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+PURGE_SECONDS = 3600  # 만료된 키를 지우는 주기 / How often expired keys are deleted
+
+REQUESTS = Counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key", ["app", "result"]
+)
+
+
+def idempotency_table(metadata, name: str = "idempotency_keys") -> Table:
+    return Table(
+        name, metadata,
+        Column("key", String(255), primary_key=True),  # 고유 인덱스 / The unique index
+        Column("request", String(255), nullable=False),  # 같은 키를 다른 요청에 재사용했는지 확인 / Detects key reuse
+        Column("status_code", Integer, nullable=False),
+        Column("body", JSON),
+        Column("created_at", DateTime(timezone=True), nullable=False, index=True),
+    )
+
+
+@dataclass(frozen=True)
+class Outcome:
+    status_code: int
+    body: dict | None = None  # 리다이렉트면 {"location": ...} / {"location": ...} for redirects
+
+    def response(self, replayed: bool = False):
+        headers = {"Idempotent-Replayed": "true"} if replayed else None
+        if 300 <= self.status_code < 400:
+            return RedirectResponse(self.body["location"], status_code=self.status_code, headers=headers)
+        return JSONResponse(self.body, status_code=self.status_code, headers=headers)
+
+
+class DuplicateKey(Exception):
+    """Raised by `stage` / `save` when a live row with the same key was committed first."""
+
+
+class IdempotencyStore:
+    """
+    Outcomes by key: a small in-process TTL cache in front of a table whose primary key
+    is the idempotency key. Concurrent duplicates inside one process wait for the first
+    request instead of running (and queueing on the slot lock) themselves.
+    """
+
+    def __init__(self, name: str, table: Table, session_factory, ttl_seconds: int = TTL_SECONDS,
+                 cache_size: int = CACHE_SIZE, persistent: bool = True):
+        self.name = name
+        self.table = table
+        self.session_factory = session_factory
+        self.ttl = ttl_seconds
+        self.cache_size = cache_size
+        self.persistent = persistent  # False -> 메모리 캐시만 (DB 조회/정리 없음) / In-memory only: no DB lookups or purges
+        self.recent: OrderedDict = OrderedDict()  # key -> (expires_at, request, Outcome)
+        self.in_flight: dict = {}  # key -> (request, Future[Outcome | None])
+        self.purged_at = 0.0
+        self.purge_task = None
+
+    async def handle(self, key: str, request: str, run) -> tuple[Outcome, bool]:
+        """Returns (outcome, replayed). Exceptions of run() propagate and nothing is stored."""
+        outcome = self._cached(key, request)
+        if outcome is None and self.persistent:
+            outcome = await self._load(key, request)
+        if outcome is not None:
+            REQUESTS.labels(self.name, "replayed").inc()
+            return outcome, True
+
+        waiting = self.in_flight.get(key)
+        if waiting is not None:
+            self._check_request(key, waiting[0], request)
+            # 같은 키의 첫 요청이 끝나기를 기다림 / Wait for the first request with this key
+            outcome = await asyncio.shield(waiting[1])
+            if outcome is not None:
+                REQUESTS.labels(self.name, "joined").inc()
+                return outcome, True
+            return await self.handle(key, request, run)  # 첫 요청이 실패 -> 다시 시도 / The first one failed: try again
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = (request, future)
+        outcome = None
+        try:
+            try:
+                outcome, replayed = await run(key), False
+            except (DuplicateKey, IntegrityError):
+                # 다른 프로세스가 같은 키로 먼저 커밋함 / Another process committed this key first
+                if not self.persistent:
+                    raise
+                outcome = await self._load(key, request)
+                if outcome is None:
+                    raise
+                replayed = True
+            self._remember(key, request, outcome)
+            REQUESTS.labels(self.name, "replayed" if replayed else "first").inc()
+            return outcome, replayed
+        finally:
+            del self.in_flight[key]
+            future.set_result(outcome)
+            self._maybe_purge()
+
+    async def stage(self, db, key: str, request: str, outcome: Outcome):
+        """
+        Adds the key to the caller's transaction (commit it together with the booking).
+        An expired row with the same key is replaced; a live one raises DuplicateKey.
+        """
+        if await db.scalar(self._upsert(key, request, outcome)) is None:
+            raise DuplicateKey(key)
+
+    async def save(self, key: str, request: str, outcome: Outcome):
+        """
+        Stores an outcome without side effects (e.g. sold out) in its own transaction.
+        Raises DuplicateKey if a duplicate committed first, so its outcome is replayed instead.
+        """
+        async with self.session_factory() as db:
+            stored = await db.scalar(self._upsert(key, request, outcome))
+            await db.commit()
+        if stored is None:
+            raise DuplicateKey(key)
+
+    def _upsert(self, key: str, request: str, outcome: Outcome):
+        # INSERT ... ON CONFLICT (key) DO UPDATE ... WHERE <만료됨 / expired> RETURNING key
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(self.table).values(
+            key=key, request=request, status_code=outcome.status_code, body=outcome.body, created_at=now,
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[self.table.c.key],
+            set_={name: stmt.excluded[name] for name in ("request", "status_code", "body", "created_at")},
+            where=self.table.c.created_at < now - timedelta(seconds=self.ttl),
+        ).returning(self.table.c.key)
+
+    def remember(self, key: str, request: str, outcome: Outcome):
+        """Keeps the outcome in the process only (for paths that have no transaction, e.g. cache mode)."""
+        self._remember(key, request, outcome)
+
+    async def clear(self, db):
+        """Forgets every key, in the caller's transaction (used by test resets)."""
+        await db.execute(delete(self.table))
+        self.recent.clear()
+
+    async def purge(self) -> int:
+        """Deletes keys older than the TTL. Returns the number of deleted keys."""
+        self.purged_at = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        async with self.session_factory() as db:
+            result = await db.execute(delete(self.table).where(self.table.c.created_at < cutoff))
+            await db.commit()
+        return result.rowcount
+
+    # --- internals --------------------------------------------------
+    def _check_request(self, key: str, stored: str, request: str):
+        if stored != request:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Idempotency-Key '{key}' was already used for a different request ({stored})",
+            )
+
+    def _cached(self, key: str, request: str) -> Outcome | None:
+        entry = self.recent.get(key)
+        if entry is None:
+            return None
+        expires_at, stored, outcome = entry
+        if expires_at < time.monotonic():
+            del self.recent[key]
+            return None
+        self._check_request(key, stored, request)
+        return outcome
+
+    def _remember(self, key: str, request: str, outcome: Outcome):
+        self.recent[key] = (time.monotonic() + self.ttl, request, outcome)
+        self.recent.move_to_end(key)
+        while len(self.recent) > self.cache_size:
+            self.recent.popitem(last=False)
+
+    async def _load(self, key: str, request: str) -> Outcome | None:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(self.table.c.request, self.table.c.status_code, self.table.c.body)
+                .where(self.table.c.key == key, self.table.c.created_at >= cutoff)
+            )).first()
+        if row is None:
+            return None
+        self._check_request(key, row.request, request)
+        outcome = Outcome(row.status_code, row.body)
+        self._remember(key, row.request, outcome)
+        return outcome
+
+    def _maybe_purge(self):
+        if self.persistent and time.monotonic() - self.purged_at > PURGE_SECONDS:
+            self.purged_at = time.monotonic()
+            self.purge_task = asyncio.get_running_loop().create_task(self._purge_quietly())
+
+    async def _purge_quietly(self):
+        try:
+            deleted = await self.purge()
+            if deleted:
+                print(f"🧹 Purged {deleted} expired idempotency keys")
+        except Exception as e:
+            print(f"🔥 Idempotency purge failed: {e}")
@@ -0,0 +1,477 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+# [부하 테스트] 모든 앱에 쓸 수 있는 비동기 부하 생성기 (attack.py 대체)
+# [Load Test] Async load generator for any of the apps (replaces the per-app attack.py scripts)
+#   - closed-loop virtual users (coroutines): concurrency, ramp-up, duration or requests per user
+#   - weighted request mix, throughput and p50/p95/p99 per request and overall
+#   - scenario checks (e.g. exactly max_slots successes, no overbooking)
+#   - JSON results, compared against a baseline run to catch regressions
+#
+#   python shared/loadtest.py viewing-war http://127.0.0.1:8000 -c 15 500 5000 --out war.json
+#   python shared/loadtest.py commute -c 50 --ramp-up 5 --duration 30 --baseline commute-before.json
+#   python shared/loadtest.py custom --mix "GET /checklist:9" "POST /checklist?item=Task-{i}:1" -c 20 --duration 10
+#   python shared/loadtest.py viewing-war -c 5000 --properties 1000 --distribution hotspot --hot-share 0.5
+
+DEFAULT_TARGET = "http://127.0.0.1:8000"
+
+
+# ===================================================================
+# Request mix
+# ===================================================================
+@dataclass
+class Step:
+    """One entry of the request mix. `path` may use {i} (request number), {user} and {pid} (see pick_property)."""
+
+    method: str
+    path: str
+    weight: float = 1.0
+    json: dict | None = None
+    ok: tuple = (200,)  # 성공으로 세는 상태 코드 / Status codes that count as a success
+    expected: tuple = ()  # 실패지만 정상적인 응답 (예: 매진 400) / Valid refusals, e.g. 400 "sold out"
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Step":
+        """'METHOD /path:weight' (weight optional), e.g. 'GET /stations/suggest?q=Zu:3'."""
+        method, _, rest = spec.strip().partition(" ")
+        path, weight = rest.strip(), 1.0
+        head, sep, tail = path.rpartition(":")
+        if sep and tail.replace(".", "", 1).isdigit():
+            path, weight = head, float(tail)
+        if not method or not path.startswith("/"):
+            raise argparse.ArgumentTypeError(f"Invalid mix entry '{spec}' (expected 'METHOD /path:weight')")
+        return cls(method.upper(), path, weight)
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    mix: list[Step]
+    requests_per_user: int | None = None  # None -> loop until --duration ends
+    setup: object = None  # async (client, target, args) -> state
+    check: object = None  # async (client, target, args, state, report) -> [check dicts]
+
+
+# ===================================================================
+# Statistics
+# ===================================================================
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+@dataclass
+class Stats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[str, int] = field(default_factory=dict)
+    success: int = 0
+    refused: int = 0
+    errors: int = 0
+
+    def record(self, step: Step, status: int | None, latency: float):
+        key = "error" if status is None else str(status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status is None:
+            self.errors += 1
+            return
+        self.latencies.append(latency)
+        if status in step.ok:
+            self.success += 1
+        elif status in step.expected:
+            self.refused += 1
+        else:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        total = sum(self.statuses.values())
+        return {
+            "requests": total,
+            "success": self.success,
+            "refused": self.refused,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        }
+
+
+# ===================================================================
+# Load generation
+# ===================================================================
+def pick_property(rng: random.Random, args) -> int:
+    """
+    Property id for one request: --property .. --property + --properties - 1.
+    uniform: every property equally often. hotspot: --hot-share of the requests go to
+    the first property, the rest are spread uniformly over all of them.
+    """
+    if args.properties <= 1:
+        return args.property
+    if args.distribution == "hotspot" and rng.random() < args.hot_share:
+        return args.property
+    return args.property + rng.randrange(args.properties)
+
+
+async def run_load(client: httpx.AsyncClient, target: str, scenario: Scenario, users: int, args) -> dict:
+    """
+    Closed-loop load: `users` coroutines, started evenly over `ramp_up` seconds, each
+    sending one request at a time until its request budget or the duration runs out.
+    """
+    steps = scenario.mix
+    weights = [step.weight for step in steps]
+    per_step = {step.name: Stats() for step in steps}
+    overall = Stats()
+    # 매물별 [응답 수, 성공 수] ({pid} 를 쓰는 mix 만) / Per property [answered, succeeded], for mixes using {pid}
+    by_property = {} if any("{pid}" in step.path for step in steps) else None
+    requests_per_user = args.requests or scenario.requests_per_user
+    counter = retries = 0
+    run_id = f"{time.time_ns():x}"
+
+    # 모든 사용자가 같은 출발선에서 시작 (ramp-up 0 = 동시에 클릭)
+    # Every user waits for the same start signal (ramp-up 0 = everybody clicks at once)
+    start_event = asyncio.Event()
+    deadline = float("inf")
+
+    async def user(number: int):
+        nonlocal counter, retries
+        rng = random.Random(args.seed * 100_003 + number)
+        await start_event.wait()
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up * number / users)
+
+        sent = 0
+        while (requests_per_user is None or sent < requests_per_user) and time.perf_counter() < deadline:
+            step = steps[0] if len(steps) == 1 else rng.choices(steps, weights)[0]
+            counter += 1
+            pid = pick_property(rng, args)
+            path = step.path.format(i=counter, user=number, pid=pid)
+            # 재시도해도 같은 키 -> 서버가 처음 결과를 돌려줌 / Same key on every retry: the server replays the first outcome
+            headers = {"Idempotency-Key": f"{run_id}-{number}-{sent}"} if args.idempotency else None
+            begin = time.perf_counter()
+            for attempt in range(args.retries + 1):
+                try:
+                    response = await client.request(step.method, target + path, json=step.json, headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = None
+                    if args.verbose:
+                        print(f"⚠️ User-{number}: {type(e).__name__} {e}")
+                # 전송 오류와 5xx 만 재시도 / Only transport errors and 5xx are retried
+                if (status is not None and status < 500) or attempt == args.retries:
+                    break
+                retries += 1
+            latency = time.perf_counter() - begin
+            per_step[step.name].record(step, status, latency)
+            overall.record(step, status, latency)
+            if by_property is not None and status is not None:
+                counts = by_property.setdefault(pid, [0, 0])
+                counts[0] += 1
+                counts[1] += status in step.ok
+            if args.verbose and status is not None:
+                print(f"User-{number}: {step.name} -> {status} ({latency * 1000:.1f} ms)")
+            sent += 1
+
+    tasks = [asyncio.create_task(user(number)) for number in range(users)]
+    await asyncio.sleep(0)  # 모든 코루틴이 출발선에 서도록 / Let every user reach the start line
+    started = time.perf_counter()
+    if requests_per_user is None:
+        deadline = started + args.ramp_up + args.duration
+    start_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "elapsed_s": round(elapsed, 3),
+        "retries": retries,
+        "overall": overall.summary(elapsed),
+        "steps": {name: stats.summary(elapsed) for name, stats in per_step.items()},
+    }
+    if by_property is not None:
+        report["by_property"] = {pid: by_property[pid] for pid in sorted(by_property)}
+    return report
+
+
+async def run_round(target: str, scenario: Scenario, users: int, args) -> dict:
+    # 가상 사용자마다 연결 하나 (연결 풀이 병목이 되지 않도록)
+    # One connection per virtual user, so the client pool is never the bottleneck
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout, follow_redirects=False) as client:
+        state = await scenario.setup(client, target, args) if scenario.setup else None
+        report = await run_load(client, target, scenario, users, args)
+        checks = await scenario.check(client, target, args, state, report) if scenario.check else []
+
+    errors = report["overall"]["errors"]
+    checks.insert(0, check("no_errors", errors == 0, f"{errors} transport errors or unexpected status codes"))
+
+    return {
+        "scenario": scenario.name,
+        "target": target,
+        "users": users,
+        "ramp_up_s": args.ramp_up,
+        "duration_s": None if (args.requests or scenario.requests_per_user) else args.duration,
+        "requests_per_user": args.requests or scenario.requests_per_user,
+        "properties": args.properties,
+        "distribution": args.distribution,
+        "idempotency": args.idempotency,
+        **report,
+        "checks": checks,
+    }
+
+
+def check(name: str, passed: bool, detail: str) -> dict:
+    return {"name": name, "passed": bool(passed), "detail": detail}
+
+
+# ===================================================================
+# Scenarios
+# ===================================================================
+async def viewing_setup(client, target, args):
+    # 매물 1..N 을 새로 만듦 / Recreates properties 1..N
+    response = await client.get(f"{target}/booking/reset", params={"properties": args.property + args.properties - 1})
+    response.raise_for_status()
+
+
+async def viewing_check(client, target, args, state, report):
+    summary = (await client.get(f"{target}/booking/summary")).json()
+    report["engine"] = summary.get("engine", "?")
+    success = report["overall"]["success"]
+    by_property = report.get("by_property") or {
+        args.property: [report["overall"]["requests"] - report["overall"]["statuses"].get("error", 0), success]
+    }
+    # 매물마다 min(정원, 응답 받은 클릭 수) 만큼 성공해야 함 / Each property: min(max_slots, answered clicks)
+    max_slots = {int(pid): slots for pid, slots in summary["max_slots"].items()}
+    expected = sum(min(max_slots.get(pid, 0), answered) for pid, (answered, _) in by_property.items())
+    wrong = [pid for pid, (answered, won) in by_property.items() if won != min(max_slots.get(pid, 0), answered)]
+    return [
+        check("exact_successes", success == expected and not wrong,
+              f"{success} successes, expected {expected}" + (f" (wrong on properties {wrong[:10]})" if wrong else "")),
+        check("persisted_bookings", summary["total_bookings"] == success,
+              f"{summary['total_bookings']} bookings in the DB for {success} successes"),
+        check("no_overbooking", not summary["overbooked"],
+              f"{summary['total_bookings']}/{summary['total_slots']} slots, overbooked: {summary['overbooked'][:10]}"),
+    ]
+
+
+async def _swisshome_status(client, target, property_id):
+    response = await client.get(f"{target}/book/{property_id}/status")
+    response.raise_for_status()
+    return response.json()
+
+
+async def swisshome_setup(client, target, args):
+    return await _swisshome_status(client, target, args.property)
+
+
+async def swisshome_check(client, target, args, before, report):
+    # 성공/매진 모두 303 이므로 DB 의 예약 수 변화로 판정 / Both outcomes are 303: judge by the bookings delta
+    # cache 모드는 백그라운드 저장이 끝날 때까지 기다림 / In cache mode, wait for the write-behind queue to drain
+    after = await _swisshome_status(client, target, args.property)
+    for _ in range(50):
+        if not after.get("pending"):
+            break
+        await asyncio.sleep(0.1)
+        after = await _swisshome_status(client, target, args.property)
+
+    attempts = report["overall"]["success"]
+    available = max(before["max_slots"] - before["current_bookings"], 0)
+    added = after["current_bookings"] - before["current_bookings"]
+    expected = min(available, attempts)
+    report["engine"] = after.get("mode", "?")
+    return [
+        check("exact_successes", added == expected, f"{added} new bookings, expected {expected}"),
+        check("no_overbooking", not after["is_overbooked"],
+              f"{after['current_bookings']}/{after['max_slots']} slots"),
+    ]
+
+
+RENT_BODY = {"gross_annual_salary": 85000, "monthly_rent": 1500, "canton": "ZH"}
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario(
+            "viewing-war", "Viewing Slot War: every user clicks reserve once, then the slots are verified",
+            [Step("POST", "/booking/reserve?property_id={pid}", expected=(400, 429))],
+            requests_per_user=1, setup=viewing_setup, check=viewing_check,
+        ),
+        Scenario(
+            "swisshome-rush", "SwissHome Rush: every user books --property once, then the bookings are verified",
+            [Step("POST", "/book/{property}", ok=(303,))],
+            requests_per_user=1, setup=swisshome_setup, check=swisshome_check,
+        ),
+        Scenario(
+            "commute", "Commute Score: station autocomplete and cache stats (no upstream calls)",
+            [Step("GET", "/stations/suggest?q=Zu", 3), Step("GET", "/stations/suggest?q=Bern", 3),
+             Step("GET", "/stations/suggest?q=Lau&limit=20", 2), Step("GET", "/cache/stats", 1)],
+        ),
+        Scenario(
+            "rent", "Rent Affordability: single JSON calculations",
+            [Step("POST", "/api/calculate", json=RENT_BODY)],
+        ),
+        Scenario(
+            "checklist", "Relocation Checklist: mostly reads, some writes",
+            [Step("GET", "/checklist", 9), Step("POST", "/checklist?item=Task-{i}", 1)],
+        ),
+        Scenario(
+            "vault-search", "Document Vault: full-text search",
+            [Step("GET", "/api/search?q=invoice", 2), Step("GET", "/api/search?q=miete", 1),
+             Step("GET", "/", 1)],
+        ),
+        Scenario("custom", "Only the --mix entries", []),
+    )
+}
+
+
+# ===================================================================
+# Reporting & regression comparison
+# ===================================================================
+def print_report(rounds: list[dict]):
+    header = (f"{'target':<26}{'scenario':<22}{'users':>7}{'reqs':>8}{'ok':>7}{'refused':>8}{'err':>6}"
+              f"{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  checks")
+    print("=" * len(header))
+    print(header)
+    print("-" * len(header))
+    for r in rounds:
+        o = r["overall"]
+        name = f"{r['scenario']}[{r['engine']}]" if r.get("engine") else r["scenario"]
+        verdict = "✅" if all(c["passed"] for c in r["checks"]) else "🚨 " + ", ".join(
+            c["name"] for c in r["checks"] if not c["passed"])
+        print(f"{r['target']:<26}{name:<22}{r['users']:>7}{o['requests']:>8}{o['success']:>7}{o['refused']:>8}"
+              f"{o['errors']:>6}{o['throughput']:>9.1f}{o['p50_ms']:>9.1f}{o['p95_ms']:>9.1f}{o['p99_ms']:>9.1f}  {verdict}")
+        if len(r["steps"]) > 1:
+            for name, s in r["steps"].items():
+                print(f"{'':<26}  {name[:27]:<27}{s['requests']:>8}{s['success']:>7}{s['refused']:>8}{s['errors']:>6}"
+                      f"{s['throughput']:>9.1f}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+        if r.get("by_property") and r.get("properties", 1) > 1:
+            busiest, (answered, won) = max(r["by_property"].items(), key=lambda item: item[1][0])
+            print(f"{'':<26}  {r['properties']} properties ({r['distribution']}), {len(r['by_property'])} hit, "
+                  f"busiest #{busiest}: {answered} clicks / {won} booked")
+        if r.get("retries"):
+            print(f"{'':<26}  {r['retries']} retries" + (" (same Idempotency-Key)" if r.get("idempotency") else ""))
+        for c in r["checks"]:
+            if not c["passed"]:
+                print(f"{'':<26}  🚨 {c['name']}: {c['detail']}")
+    print("=" * len(header))
+
+
+def compare(rounds: list[dict], baseline: dict, max_regression: float) -> list[str]:
+    """
+    Compares rounds with the same (scenario, target, users, properties, distribution) in a previous results file.
+    Returns one line per metric that got worse by more than `max_regression` percent.
+    """
+    def key(r):
+        return r["scenario"], r["target"], r["users"], r.get("properties", 1), r.get("distribution", "uniform")
+
+    previous = {key(r): r for r in baseline["rounds"]}
+    regressions = []
+    print(f"📊 Compared with {baseline.get('created_at', 'baseline')} (tolerance {max_regression:.0f}%)")
+    for r in rounds:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        for metric, higher_is_better in (("throughput", True), ("p95_ms", False), ("p99_ms", False)):
+            before, now = old["overall"][metric], r["overall"][metric]
+            if not before:
+                continue
+            change = (now - before) / before * 100
+            worse = -change if higher_is_better else change
+            label = f"{r['target']} {r['scenario']} {r['users']} users {metric}: {before:.1f} -> {now:.1f} ({change:+.1f}%)"
+            if worse > max_regression:
+                regressions.append(label)
+                print(f"  🚨 {label}")
+            else:
+                print(f"  ✅ {label}")
+    return regressions
+
+
+# ===================================================================
+# CLI
+# ===================================================================
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Async load generator for the SwissHome Rush apps")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS), help="Preset request mix (+ correctness checks)")
+    parser.add_argument("targets", nargs="*", default=[DEFAULT_TARGET], help="Base URLs (several are compared side by side)")
+    parser.add_argument("-c", "-u", "--concurrency", "--users", dest="concurrency", type=int, nargs="+", default=[15],
+                        help="Concurrent virtual users (several values run several rounds)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which the users start (0 = all at once)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per round (after ramp-up)")
+    parser.add_argument("--requests", type=int, default=None, help="Requests per user instead of a duration")
+    parser.add_argument("--mix", type=Step.parse, nargs="+", default=None,
+                        help="Request mix, e.g. 'GET /checklist:9' 'POST /checklist?item=T{i}:1' (replaces the preset)")
+    parser.add_argument("--property", type=int, default=1, help="Property id for the booking scenarios (first one with --properties)")
+    parser.add_argument("--properties", type=int, default=1, help="Spread {pid} over this many properties (viewing-war)")
+    parser.add_argument("--distribution", choices=("uniform", "hotspot"), default="uniform",
+                        help="How {pid} is picked: uniform, or hotspot (--hot-share of the clicks on the first property)")
+    parser.add_argument("--hot-share", type=float, default=0.9, help="Share of the clicks on the hot property (hotspot)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=0, help="Retry transport errors and 5xx up to N times")
+    parser.add_argument("--idempotency", action="store_true",
+                        help="Send an Idempotency-Key per request (the same key on its retries)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the request mix")
+    parser.add_argument("--out", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Previous --out file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed throughput/p95/p99 regression in %%")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print one line per request")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    preset = SCENARIOS[args.scenario]
+    mix = args.mix or preset.mix
+    if not mix:
+        raise SystemExit("The custom scenario needs --mix")
+    # 매물 번호 같은 고정값은 여기서 채움 / Fill fixed placeholders such as the property id
+    mix = [Step(s.method, s.path.replace("{property}", str(args.property)), s.weight, s.json, s.ok, s.expected) for s in mix]
+    scenario = Scenario(preset.name, preset.description, mix, preset.requests_per_user, preset.setup, preset.check)
+
+    rounds = []
+    for users in args.concurrency:
+        for target in args.targets:
+            target = target.rstrip("/")
+            print(f"🔥 {scenario.name}: {users} users on {target} ...")
+            try:
+                rounds.append(asyncio.run(run_round(target, scenario, users, args)))
+            except httpx.HTTPError as e:  # 서버가 꺼져 있거나 setup/check 요청 실패 / Server down, setup or check failed
+                raise SystemExit(f"🔥 {target}: {type(e).__name__} {e}")
+
+    print_report(rounds)
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "argv": sys.argv[1:] if argv is None else list(argv),
+        "rounds": rounds,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"💾 Results saved to {args.out}")
+
+    failed = [c for r in rounds for c in r["checks"] if not c["passed"]]
+    regressions = compare(rounds, json.loads(Path(args.baseline).read_text()), args.max_regression) if args.baseline else []
+    # CI 에서 쓸 수 있도록 검사 실패/성능 저하 시 종료 코드 1 / Exit code 1 on failed checks or regressions
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
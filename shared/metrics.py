@@ -0,0 +1,310 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import perf_counter
+
+# [메트릭] Prometheus 텍스트 형식으로 내보내는 최소한의 메트릭 도구 (외부 라이브러리 없음)
+# [Metrics] Minimal metric primitives exported in the Prometheus text format (no dependencies)
+#
+#   instrument(app)                          # request latency / in-flight middleware + GET /metrics
+#   with timer("reserve_lock_wait"): ...     # named hot-section timer -> app_section_seconds{section=...}
+#   REQUESTS = Counter("jobs_total", "Jobs processed", ["status"]); REQUESTS.labels("done").inc()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 초 단위 / Seconds: 1 ms .. 30 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def header(name: str, kind: str, help_text: str) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+class Registry:
+    """Every metric family of the process, plus collector callbacks (e.g. DB pool gauges)."""
+
+    def __init__(self):
+        self.families: dict[str, "_Family"] = {}
+        self.collectors = []  # callables returning exposition lines
+
+    def register(self, family: "_Family"):
+        if family.name in self.families:
+            raise ValueError(f"Metric '{family.name}' is already registered")
+        self.families[family.name] = family
+
+    def add_collector(self, collect):
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families.values():
+            lines += family.collect()
+        for collect in self.collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Family:
+    """A named metric with label names; `.labels(*values)` returns the series for those values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.children: dict[tuple, object] = {}
+        self.lock = Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        # 빠른 경로: 이미 있는 시리즈는 dict 조회 한 번 / Fast path: one dict lookup for existing series
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _series(self, child, labels: dict) -> list[str]:
+        return [f"{self.name}{format_labels(labels)} {child.value}"]
+
+    def collect(self) -> list[str]:
+        lines = header(self.name, self.kind, self.help_text)
+        for values, child in list(self.children.items()):
+            lines += self._series(child, dict(zip(self.labelnames, values)))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = Lock()
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class HistogramValue:
+    """Cumulative-bucket histogram series, safe to observe from several threads."""
+
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def samples(self, name: str, labels: dict | None = None) -> list[str]:
+        labels = labels or {}
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {total}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = buckets
+        super().__init__(name, help_text, labelnames, registry)
+
+    def _new_child(self):
+        return HistogramValue(self.buckets)
+
+    def _series(self, child, labels: dict) -> list[str]:
+        return child.samples(self.name, labels)
+
+
+# ===================================================================
+# Named timers around hot sections
+# ===================================================================
+SECTION_SECONDS = Histogram(
+    "app_section_seconds",
+    "Time spent in named hot sections (lock wait/hold, upstream calls, OCR)",
+    ["section"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class timer:
+    """
+    Records the elapsed time of a section into app_section_seconds{section=name}.
+
+        with timer("reserve_lock_wait"):
+            ...
+
+        hold = timer("reserve_lock_hold").start()   # when the section doesn't fit one block
+        ...
+        hold.stop()
+    """
+
+    __slots__ = ("series", "started")
+
+    def __init__(self, section: str):
+        self.series = SECTION_SECONDS.labels(section)
+        self.started = None
+
+    def start(self) -> "timer":
+        self.started = perf_counter()
+        return self
+
+    def stop(self) -> float:
+        """Records the section once (later calls are ignored) and returns its duration."""
+        if self.started is None:
+            return 0.0
+        elapsed = perf_counter() - self.started
+        self.started = None
+        self.series.observe(elapsed)
+        return elapsed
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# ===================================================================
+# HTTP middleware
+# ===================================================================
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"]
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+
+def _route_label(scope) -> str:
+    # 경로 템플릿 사용 (/book/{property_id}) -> 라벨 수가 URL 수만큼 늘지 않음
+    # Use the route template (/book/{property_id}) so label cardinality stays bounded
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("root_path"):
+        return scope["root_path"] + "/*"  # mounted app, e.g. /static/*
+    return "unmatched"
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware: one perf_counter pair, one gauge update and one histogram observe per request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = IN_FLIGHT.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # 응답 전에 예외가 나면 500 으로 기록 / Exceptions before a response count as 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # 이벤트 루프 스레드에서만 바뀌므로 락 불필요 / Only touched on the event loop thread: no lock needed
+        in_flight = self.in_flight
+        started = perf_counter()
+        in_flight.value += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.value -= 1
+            REQUEST_SECONDS.labels(scope["method"], _route_label(scope), status).observe(perf_counter() - started)
+
+
+async def metrics_endpoint():
+    """GET /metrics handler (Prometheus text format)."""
+    from fastapi.responses import Response
+
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def instrument(app):
+    """Adds the request middleware and GET /metrics to a FastAPI app."""
+    app.add_middleware(PrometheusMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+    return app
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves /metrics from a background thread, for processes without a web app (e.g. OCR workers)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,58 @@
+import gzip
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# [정적 페이지 캐시] 결과가 없는 첫 화면은 항상 같으므로 한 번만 렌더링/압축
+# [Static Page Cache] A page that never changes (e.g. an initial page without a result)
+# is rendered and compressed once, then served with an ETag.
+#
+#   app.state.initial_page = StaticPage(template.render(...))
+#   return app.state.initial_page.response(request)      # 200 (br/gzip/identity) or 304
+
+try:
+    import brotli
+except ImportError:  # brotli 는 선택 사항 / brotli is optional; gzip always works
+    brotli = None
+
+# 1분 동안 재사용 후 If-None-Match 로 재검증 / Reused for a minute, then revalidated
+CACHE_CONTROL = "public, max-age=60"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # '"abc", W/"def"' 형식 지원 / Handles lists, weak validators and "*"
+    return any(
+        candidate.strip() == "*" or candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class StaticPage:
+    """Pre-rendered body with identity/gzip/brotli variants and one strong ETag per encoding."""
+
+    def __init__(self, html: str, media_type: str = "text/html; charset=utf-8"):
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        self.media_type = media_type
+        self.variants = {"identity": (f'"{digest}"', body)}  # encoding -> (etag, body)
+        self.variants["gzip"] = (f'"{digest}-gz"', gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            self.variants["br"] = (f'"{digest}-br"', brotli.compress(body, quality=11))
+
+    def pick_encoding(self, accept_encoding: str) -> str:
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        # brotli > gzip > 압축 없음 / Prefer brotli, then gzip, then uncompressed
+        return next((e for e in ("br", "gzip") if e in self.variants and e in accepted), "identity")
+
+    def response(self, request: Request) -> Response:
+        encoding = self.pick_encoding(request.headers.get("accept-encoding", ""))
+        etag, body = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from shared.metrics import Counter
+
+# [대기실] 매물별 FIFO 입장 제어: 남은 자리 + 여유분 만큼만 DB 까지 보내고 나머지는 즉시 거절
+# [Waiting Room] Per-property FIFO admission in front of a booking endpoint.
+#
+#   room = WaitingRoom("viewing", load_remaining)        # load_remaining(key) -> free slots, or None if unknown
+#   async with room.admit(property_id) as ticket:        # raises Rejected(ticket) when the window is full
+#       ... book in the DB ...; ticket.booked()  (or ticket.sold_out())
+#
+# Every click gets a queue position in arrival order. At most `remaining + margin` clicks
+# are in flight to the database at once; the margin covers admitted clicks that end up
+# failing. Everyone else is answered from memory, so a drop of N clicks on M slots costs
+# O(M) database work instead of O(N). The database stays the source of truth: the room
+# only decides who gets to ask it.
+
+MARGIN = int(os.getenv("WAITING_ROOM_MARGIN", "2"))
+# 남은 자리 수를 DB 에서 다시 읽는 주기 (다른 프로세스의 예약/취소 반영)
+# How often an idle room re-reads its remaining slots (bookings or cancellations by other processes)
+REFRESH_SECONDS = float(os.getenv("WAITING_ROOM_REFRESH_SECONDS", "5"))
+
+DECISIONS = Counter(
+    "waiting_room_decisions_total", "Waiting-room decisions per click", ["room", "decision"]
+)
+
+
+class Ticket:
+    __slots__ = ("key", "position", "remaining", "admitted", "outcome", "_line")
+
+    def __init__(self, key, position: int, line=None):
+        self.key = key
+        self.position = position  # 이번 회차의 도착 순서 (1 부터) / Arrival order since the room was (re)loaded
+        self.remaining = None
+        self.admitted = False
+        self.outcome = None
+        self._line = line
+
+    def booked(self):
+        self.outcome = "booked"
+
+    def sold_out(self):
+        self.outcome = "sold_out"
+
+    def detail(self) -> dict:
+        return {"queue_position": self.position, "remaining_slots": self.remaining}
+
+
+class Rejected(Exception):
+    """Raised by `WaitingRoom.admit` for a click that was not let through."""
+
+    def __init__(self, ticket: Ticket):
+        super().__init__(f"Rejected at queue position {ticket.position}")
+        self.ticket = ticket
+        # 자리가 0 이면 매진, 아니면 앞사람들이 남은 자리를 모두 차지하는 중
+        # No slots left: sold out. Otherwise everyone ahead is already claiming the remaining slots.
+        self.sold_out = ticket.remaining == 0
+
+
+class _Line:
+    __slots__ = ("remaining", "in_flight", "arrivals", "loaded_at", "loading")
+
+    def __init__(self):
+        self.remaining = None
+        self.in_flight = 0
+        self.arrivals = 0
+        self.loaded_at = 0.0
+        self.loading = None
+
+
+class WaitingRoom:
+    """
+    One line per key (property id). Admission decisions run on the event loop without
+    an `await` between check and update, so they are atomic; the only await is the
+    single-flight load of the remaining slots, and waiters resume in arrival order.
+    The state is per process: with several workers each one admits its own window.
+    """
+
+    def __init__(self, name: str, load_remaining, margin: int = MARGIN, refresh_seconds: float = REFRESH_SECONDS):
+        self.name = name
+        self.load_remaining = load_remaining
+        self.margin = margin
+        self.refresh_seconds = refresh_seconds
+        self.lines: dict = {}
+
+    async def enter(self, key) -> Ticket:
+        line = self.lines.get(key)
+        if line is None:
+            line = self.lines[key] = _Line()
+        if line.in_flight == 0 and time.monotonic() - line.loaded_at > self.refresh_seconds:
+            await self._load(key, line)
+            if line.remaining is None:
+                # 없는 매물: 그대로 통과시켜 핸들러가 404 를 돌려줌 / Unknown key: let the handler answer 404
+                self.lines.pop(key, None)
+                ticket = Ticket(key, 0)
+                ticket.admitted = True
+                return ticket
+
+        # 여기부터 await 없음 -> 판정과 갱신이 끼어들 수 없음 / No await from here on
+        line.arrivals += 1
+        ticket = Ticket(key, line.arrivals, line)
+        ticket.remaining = line.remaining
+        if line.remaining > 0 and line.in_flight < line.remaining + self.margin:
+            line.in_flight += 1
+            ticket.admitted = True
+            DECISIONS.labels(self.name, "admitted").inc()
+        else:
+            DECISIONS.labels(self.name, "sold_out" if line.remaining == 0 else "full").inc()
+        return ticket
+
+    def leave(self, ticket: Ticket):
+        line = ticket._line
+        if line is None or self.lines.get(ticket.key) is not line:
+            return  # 입장 후 reset 된 회차 / The room was reset while this click was inside
+        line.in_flight -= 1
+        if ticket.outcome == "booked":
+            line.remaining = max(line.remaining - 1, 0)
+        elif ticket.outcome == "sold_out":
+            line.remaining = 0  # DB 가 매진이라고 답함 / The database said so
+        # 결과 없이 끝난 요청 (오류) 은 자리만 돌려줌 / A click that failed just frees its place
+
+    @asynccontextmanager
+    async def admit(self, key):
+        ticket = await self.enter(key)
+        if not ticket.admitted:
+            raise Rejected(ticket)
+        try:
+            yield ticket
+        finally:
+            self.leave(ticket)
+
+    def reset(self, key=None):
+        """Forgets the line of `key` (or every line): the next click reloads it from the database."""
+        if key is None:
+            self.lines.clear()
+        else:
+            self.lines.pop(key, None)
+
+    async def _load(self, key, line: _Line):
+        # 동시에 도착한 첫 클릭들은 같은 조회 하나를 기다림 / Concurrent first clicks share one query
+        if line.loading is None:
+            line.loading = asyncio.ensure_future(self._refresh(key, line))
+        await asyncio.shield(line.loading)
+
+    async def _refresh(self, key, line: _Line):
+        try:
+            remaining = await self.load_remaining(key)
+        finally:
+            line.loading = None
+        line.remaining = None if remaining is None else max(remaining, 0)
+        line.loaded_at = time.monotonic()
+        line.arrivals = 0  # 새 회차 / A fresh round of queue positions